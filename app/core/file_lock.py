@@ -0,0 +1,30 @@
+# app/core/file_lock.py
+# Exclusive locks on open files, held against other threads (each opens its own file)
+# and other worker processes: fcntl.flock on POSIX, msvcrt.locking on Windows.
+import os
+
+if os.name == "nt":
+    import msvcrt
+
+    def lock_file(f) -> None:
+        """Block until f is exclusively locked (its first byte; the file may be empty)."""
+        f.seek(0)
+        while True:
+            try:
+                msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+                return
+            except OSError:
+                continue   # LK_LOCK gives up after ~10 s; keep waiting like flock does
+
+    def unlock_file(f) -> None:
+        f.seek(0)
+        msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+else:
+    import fcntl
+
+    def lock_file(f) -> None:
+        """Block until f is exclusively locked."""
+        fcntl.flock(f, fcntl.LOCK_EX)
+
+    def unlock_file(f) -> None:
+        fcntl.flock(f, fcntl.LOCK_UN)
@@ -1,3 +1,11 @@
+import os
+import hmac
+import time
+import base64
+import hashlib
+import asyncio
+from concurrent.futures import ProcessPoolExecutor
+from fastapi import HTTPException
 from passlib.context import CryptContext
 from jose import JWTError,jwt
 from datetime import datetime, timedelta
@@ -6,7 +14,21 @@ SECRET_KEY = "supersecret"  # change later
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 60
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# bcrypt cost; hashes made with a different cost are transparently re-hashed on the next login
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+# bcrypt burns ~100-300 ms of CPU per call, so it runs in worker processes, off the event loop
+# and the request threadpool; beyond HASH_MAX_PENDING queued calls new logins get a 503.
+HASH_WORKERS = int(os.getenv("HASH_WORKERS", str(min(4, os.cpu_count() or 1))))
+HASH_MAX_PENDING = int(os.getenv("HASH_MAX_PENDING", "64"))
+
+# Pre-signed download URLs: anyone holding one may fetch that blob until it expires
+DOWNLOAD_URL_SECRET = os.getenv("DOWNLOAD_URL_SECRET", SECRET_KEY)
+DOWNLOAD_URL_TTL = int(os.getenv("DOWNLOAD_URL_TTL", "300"))   # seconds
+
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=BCRYPT_ROUNDS)
+
+_hash_pool: ProcessPoolExecutor | None = None
+_pending = 0
 
 def hash_password(password: str) -> str:
     return pwd_context.hash(password)
@@ -14,6 +36,55 @@ def hash_password(password: str) -> str:
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
 
+def verify_password_and_check(plain_password: str, hashed_password: str) -> tuple[bool, bool]:
+    """(password matches, hash should be upgraded to the current cost)."""
+    if not pwd_context.verify(plain_password, hashed_password):
+        return False, False
+    return True, pwd_context.needs_update(hashed_password)
+
+# ---------------- Hashing pool ----------------
+def _get_hash_pool() -> ProcessPoolExecutor:
+    global _hash_pool
+    if _hash_pool is None:
+        _hash_pool = ProcessPoolExecutor(max_workers=HASH_WORKERS)
+    return _hash_pool
+
+async def _run_in_hash_pool(fn, *args):
+    global _pending
+    if _pending >= HASH_MAX_PENDING:
+        raise HTTPException(status_code=503, detail="Too many sign-ins in progress, please retry", headers={"Retry-After": "1"})
+    _pending += 1
+    try:
+        return await asyncio.get_running_loop().run_in_executor(_get_hash_pool(), fn, *args)
+    finally:
+        _pending -= 1
+
+async def ahash_password(password: str) -> str:
+    return await _run_in_hash_pool(hash_password, password)
+
+async def averify_password(plain_password: str, hashed_password: str) -> tuple[bool, bool]:
+    """Async verify_password_and_check on the hashing pool."""
+    return await _run_in_hash_pool(verify_password_and_check, plain_password, hashed_password)
+
+def shutdown_hash_pool():
+    global _hash_pool
+    if _hash_pool is not None:
+        _hash_pool.shutdown(wait=False, cancel_futures=True)
+        _hash_pool = None
+
+# ---------------- Signed download URLs ----------------
+def sign_download(content_hash: str, filename: str, expires: int) -> str:
+    message = f"{content_hash}\n{filename}\n{expires}".encode()
+    digest = hmac.new(DOWNLOAD_URL_SECRET.encode(), message, hashlib.sha256).digest()
+    return base64.urlsafe_b64encode(digest).decode().rstrip("=")
+
+def verify_download_signature(content_hash: str, filename: str, expires: int, signature: str) -> bool:
+    """Constant-time check of a download URL signature; expired URLs never verify."""
+    if expires < time.time():
+        return False
+    # compare bytes: compare_digest raises TypeError on non-ASCII str
+    return hmac.compare_digest(sign_download(content_hash, filename, expires).encode(), signature.encode())
+
 def create_access_token(data: dict, expires_delta: timedelta | None = None):
     to_encode = data.copy()
     expire = datetime.utcnow() + (expires_delta or timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES))
@@ -1,43 +1,72 @@
 # backend/app/main.py
 import os
-import re
-import requests
-from typing import Optional
+import asyncio
+from contextlib import asynccontextmanager
 
 from fastapi import FastAPI, Depends, HTTPException
 from fastapi.staticfiles import StaticFiles
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, StreamingResponse
+from starlette.concurrency import run_in_threadpool
 from dotenv import load_dotenv
 
 # load environment variables from .env if present
 load_dotenv()
 
-# only import OpenAI client if user provided a key (safe init)
-OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
-if OPENAI_API_KEY:
-    from openai import OpenAI
-    openai_client = OpenAI(api_key=OPENAI_API_KEY)
-else:
-    openai_client = None
+from sqlalchemy import inspect
 
-HF_API_KEY = os.getenv("HF_API_KEY")        # Hugging Face token (preferred for quick integration)
-HF_MODEL = os.getenv("HF_MODEL", "sshleifer/distilbart-cnn-12-6")  # default HF model for summarization
-
-from app.database import Base, engine, SessionLocal
-from app.routes import auth, document, user  # import routers
+from app.database import Base, engine, SessionLocal, pool_stats, dispose_async_engine
+from app.routes import auth, document, user, chat  # import routers
 from app.models.user import User
-from app.routes.auth import get_current_user
+from app.routes.auth import get_current_user, get_token_principal
+from app.services.auth_service import Principal
+from app.services.visibility_service import backfill_document_visibility
+from app.services.ai_helpers import close_http_client
+from app.core.security import shutdown_hash_pool
+from app.services.extractors import shutdown_pdf_pool
+from app.services import summary_jobs
+from mychatbot.model_server import model_server
+from mychatbot import rasa_client
+
+CHATBOT_WARMUP = os.getenv("CHATBOT_WARMUP", "1") == "1"
 
 # Create database tables (only run once)
+# document_visibility is derived from documents + document_access: when create_all adds it to
+# an existing database (before the migration ran), fill it so no document disappears.
+_backfill_visibility = not inspect(engine).has_table("document_visibility")
 Base.metadata.create_all(bind=engine)
-
-app = FastAPI(title="KMRL SmartDocs Backend")
+if _backfill_visibility:
+    with SessionLocal() as _db:
+        backfill_document_visibility(_db)
+        _db.commit()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    summary_jobs.start_workers()
+    model_server.start()
+    if CHATBOT_WARMUP:
+        try:
+            # load the chatbot model before serving so the first chat is not a cold start
+            await asyncio.get_running_loop().run_in_executor(None, model_server.warm_up)
+        except Exception as e:
+            print("Chatbot model warm-up skipped:", e)
+    yield
+    await model_server.stop()
+    await rasa_client.close_client()
+    await summary_jobs.stop_workers()
+    # release pooled connections to HF/OpenAI on shutdown
+    await close_http_client()
+    shutdown_hash_pool()
+    shutdown_pdf_pool()
+    await dispose_async_engine()
+
+app = FastAPI(title="KMRL SmartDocs Backend", lifespan=lifespan)
 
 # Include routers first (so routes take precedence over static files)
 app.include_router(user.router, prefix="/users", tags=["users"])
 app.include_router(auth.router, prefix="/auth", tags=["Authentication"])
 app.include_router(document.router, prefix="/documents", tags=["documents"])
+app.include_router(chat.router, prefix="/chat", tags=["chat"])
 
 # Enable CORS for frontend (development)
 app.add_middleware(
@@ -46,147 +75,63 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
 
-# ---------------- Utilities ----------------
-def mock_summary(text: str) -> str:
-    """Very small fallback summarizer: take first 2-3 sentences."""
-    sentences = re.split(r'(?<=[.!?])\s+', text.strip())
-    return " ".join(sentences[:3]) if sentences else ""
-
-def extract_text_from_file(file_path: str) -> str:
-    """
-    Try to read file as UTF-8 text; if fails, attempt PDF / DOCX extraction.
-    Raises HTTPException with instructive message on failure.
-    """
-    # try plain text first
-    try:
-        with open(file_path, "r", encoding="utf-8") as f:
-            return f.read()
-    except UnicodeDecodeError:
-        pass
-    except Exception as e:
-        raise HTTPException(status_code=400, detail=f"Failed to read file: {str(e)}")
-
-    # fallback by extension
-    ext = os.path.splitext(file_path)[1].lower()
-    if ext == ".pdf":
-        try:
-            from PyPDF2 import PdfReader
-        except Exception as e:
-            raise HTTPException(status_code=400, detail="To extract PDF text install PyPDF2: pip install PyPDF2")
-        try:
-            reader = PdfReader(file_path)
-            pages = [p.extract_text() or "" for p in reader.pages]
-            return "\n".join(pages)
-        except Exception as e:
-            raise HTTPException(status_code=400, detail=f"PDF extraction failed: {str(e)}")
-
-    if ext in (".docx",):
-        try:
-            import docx
-            from docx import Document as DocxDocument
-        except Exception:
-            raise HTTPException(status_code=400, detail="To extract DOCX text install python-docx: pip install python-docx")
-        try:
-            doc = DocxDocument(file_path)
-            paragraphs = [p.text for p in doc.paragraphs]
-            return "\n".join(paragraphs)
-        except Exception as e:
-            raise HTTPException(status_code=400, detail=f"DOCX extraction failed: {str(e)}")
-
-    raise HTTPException(status_code=400, detail="Unsupported file format. Supported: .txt, .pdf, .docx")
-
-def summarize_with_hf(text: str) -> Optional[str]:
-    """Call Hugging Face Inference API; return summary string or None on failure."""
-    if not HF_API_KEY:
-        return None
-
-    url = f"https://api-inference.huggingface.co/models/{HF_MODEL}"
-    headers = {"Authorization": f"Bearer {HF_API_KEY}"}
-    payload = {
-        "inputs": text,
-        "parameters": {"max_length": 130, "min_length": 30},
-    }
-    try:
-        resp = requests.post(url, headers=headers, json=payload, timeout=30)
-    except Exception as e:
-        # network or DNS error
-        return None
-
-    if resp.status_code != 200:
-        # non-200 => treat as failure (caller may fallback)
-        return None
-
-    try:
-        data = resp.json()
-        # HF model usually returns [{'summary_text': '...'}] for summarization models
-        if isinstance(data, list) and isinstance(data[0], dict) and "summary_text" in data[0]:
-            return data[0]["summary_text"]
-        # some models return plain text or different schema; attempt to handle common cases
-        if isinstance(data, dict) and "summary_text" in data:
-            return data["summary_text"]
-        if isinstance(data, list) and isinstance(data[0], str):
-            return data[0]
-        # otherwise return stringified response
-        return str(data)
-    except Exception:
-        return None
-
-def summarize_with_openai(text: str) -> Optional[str]:
-    """Call OpenAI if configured; returns summary or None on error."""
-    if not openai_client:
-        return None
-    try:
-        response = openai_client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[
-                {"role": "system", "content": "You are a helpful assistant that summarizes documents."},
-                {"role": "user", "content": f"Summarize the following document:\n\n{text}"}
-            ],
-            max_completion_tokens=250
-        )
-        # Extract result (SDK may return nested structure)
-        return response.choices[0].message.content
-    except Exception as e:
-        # bubble up None to let caller fallback
-        return None
-
-# ---------------- Summarization Endpoint ----------------
+# ---------------- Summarization Endpoints ----------------
 @app.get("/summarize/{doc_id}")
 async def summarize_document(doc_id: int):
-    from app.models.document import Document
-    db = SessionLocal()
-    try:
-        doc = db.query(Document).filter(Document.id == doc_id).first()
-        if not doc:
-            raise HTTPException(status_code=404, detail="Document not found")
-
-        file_path = getattr(doc, "file_path", None)
-        if not file_path or not os.path.exists(file_path):
-            raise HTTPException(status_code=404, detail="File not found on server")
-
-        # Extract text (supports .txt, .pdf, .docx if libs installed)
-        text = extract_text_from_file(file_path)
-        if not text or not text.strip():
-            raise HTTPException(status_code=400, detail="Document contains no extractable text")
-
-        # Try Hugging Face first (recommended for quick free-tier integration)
-        hf_summary = summarize_with_hf(text)
-        if hf_summary:
-            return {"summary": hf_summary, "source": "huggingface"}
-
-        # Then try OpenAI if configured
-        openai_summary = summarize_with_openai(text)
-        if openai_summary:
-            return {"summary": openai_summary, "source": "openai"}
-
-        # Fallback to a simple local summarizer
-        fallback = mock_summary(text)
-        return {"summary": fallback, "source": "fallback"}
-
-    finally:
-        db.close()
+    # Cached summaries are answered directly; only misses wait for a queue worker
+    _, _, cached = await run_in_threadpool(summary_jobs.lookup_document, doc_id)
+    if cached:
+        return cached
+    # Runs through the job queue too, so concurrent callers share one summarization
+    job = summary_jobs.submit(doc_id)
+    await job.wait()
+    if job.status == "failed":
+        raise HTTPException(status_code=job.status_code or 500, detail=job.error)
+    return job.result
+
+@app.post("/summarize/{doc_id}", status_code=202)
+async def enqueue_summary(doc_id: int):
+    job = summary_jobs.submit(doc_id)
+    return {
+        "job_id": job.id,
+        "status": job.status,
+        "status_url": f"/summarize/jobs/{job.id}",
+        "events_url": f"/summarize/jobs/{job.id}/events",
+    }
+
+@app.get("/summarize/{doc_id}/stream")
+async def stream_summary(doc_id: int):
+    # resolve the document up front so a missing file is a plain 404, not a broken stream
+    file_path, file_hash, cached = await run_in_threadpool(summary_jobs.lookup_document, doc_id)
+    return StreamingResponse(
+        summary_jobs.stream_summary(doc_id, file_path, file_hash, cached),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@app.get("/summarize/jobs/{job_id}")
+async def get_summary_job(job_id: str):
+    return summary_jobs.get_job(job_id).to_dict()
+
+@app.get("/summarize/jobs/{job_id}/events")
+async def stream_summary_job(job_id: str):
+    job = summary_jobs.get_job(job_id)
+    return StreamingResponse(
+        summary_jobs.job_events(job),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+# ---------------- Metrics ----------------
+@app.get("/metrics/db")
+def db_metrics(current_user: Principal = Depends(get_token_principal)):
+    """Connection pool occupancy and checkout wait times (admins only)."""
+    if current_user.role != "Admin":
+        raise HTTPException(status_code=403, detail="Only admins can view metrics.")
+    return pool_stats()
 
 # ---------------- Dashboard & static serving ----------------
 SENIOR_ROLES = {
@@ -199,7 +144,7 @@ SENIOR_ROLES = {
 }
 
 @app.get("/dashboard")
-def dashboard(current_user: User = Depends(get_current_user)):
+def dashboard(current_user: Principal = Depends(get_token_principal)):
     if current_user.role in SENIOR_ROLES:
         return FileResponse(os.path.join("frontend", "dashboard.html"))
     else:
@@ -1,17 +1,25 @@
 from sqlalchemy.orm import relationship
-from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Text
+from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Text, Index
 from app.database import Base
 from datetime import datetime
 
 class Document(Base):
     __tablename__ = "documents"
+    __table_args__ = (
+        # newest-first keyset pages of /documents/list, unfiltered and per filter
+        Index("ix_documents_uploaded_at_id", "uploaded_at", "id"),
+        Index("ix_documents_department_uploaded_at_id", "department", "uploaded_at", "id"),
+        Index("ix_documents_access_role_uploaded_at_id", "access_role", "uploaded_at", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     title = Column(String, nullable=True)
     description = Column(Text, nullable=True)
     filename = Column(String, nullable=False)
-    file_path = Column(String, nullable=False)
-    user_id = Column(Integer, ForeignKey("users.id"))
+    file_path = Column(String, nullable=False, index=True)      # blob reference counting on delete
+    content_hash = Column(String(64), nullable=True, index=True)   # sha256 of the stored file
+    file_size = Column(Integer, nullable=True)
+    user_id = Column(Integer, ForeignKey("users.id"), index=True)
     department = Column(String, nullable=True)
     access_role = Column(String, nullable=True, default="All Employees")
     uploaded_at = Column(DateTime, default=datetime.utcnow)
@@ -1,10 +1,15 @@
 # app/models/document_access.py
-from sqlalchemy import Column, Integer, String, ForeignKey
+from sqlalchemy import Column, Integer, String, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from app.database import Base
 
 class DocumentAccess(Base):
     __tablename__ = "document_access"
+    __table_args__ = (
+        # access checks read document_visibility; this serves deletes (access_list cascade)
+        # and the visibility backfill join
+        Index("ix_document_access_doc_id", "doc_id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
 
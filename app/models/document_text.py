@@ -0,0 +1,16 @@
+# app/models/document_text.py
+from sqlalchemy import Column, Integer, Text, ForeignKey, Index
+from sqlalchemy.dialects.postgresql import TSVECTOR
+from app.database import Base
+
+class DocumentText(Base):
+    __tablename__ = "document_texts"
+    __table_args__ = (
+        Index("ix_document_texts_search_vector", "search_vector", postgresql_using="gin"),
+    )
+
+    doc_id = Column(Integer, ForeignKey("documents.id", ondelete="CASCADE"), primary_key=True)
+
+    # extracted text (used for highlighted snippets) and its full-text index
+    content = Column(Text, nullable=False, default="")
+    search_vector = Column(TSVECTOR().with_variant(Text(), "sqlite"), nullable=True)
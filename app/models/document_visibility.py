@@ -0,0 +1,18 @@
+# app/models/document_visibility.py
+from sqlalchemy import Column, Integer, String, ForeignKey, Index
+from app.database import Base
+
+class DocumentVisibility(Base):
+    """
+    Materialized "which roles may open which documents": one row per (role, document).
+    Documents shared with All Employees get a single row with role "*".
+    Derived from documents.access_role + document_access; maintained on upload/delete.
+    """
+    __tablename__ = "document_visibility"
+    __table_args__ = (
+        Index("ix_document_visibility_doc_id", "doc_id"),
+    )
+
+    # (role, doc_id) primary key: "what can role X see" and "can X open Y" are index-only lookups
+    role = Column(String, primary_key=True)
+    doc_id = Column(Integer, ForeignKey("documents.id", ondelete="CASCADE"), primary_key=True)
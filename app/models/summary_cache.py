@@ -0,0 +1,27 @@
+# app/models/summary_cache.py
+from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Text, UniqueConstraint, Index
+from app.database import Base
+from datetime import datetime
+
+class SummaryCache(Base):
+    __tablename__ = "summary_cache"
+    __table_args__ = (
+        UniqueConstraint("doc_id", "file_hash", "backend", "model", "params", name="uq_summary_cache_key"),
+        # cache lookups by content: identical files uploaded as other documents share summaries
+        Index("ix_summary_cache_file_hash_backend_model", "file_hash", "backend", "model"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    doc_id = Column(Integer, ForeignKey("documents.id", ondelete="CASCADE"), index=True, nullable=False)
+
+    # sha256 of the file the summary was produced from; a replaced file never matches
+    file_hash = Column(String(64), nullable=False)
+
+    # provenance: which backend/model/parameters produced this summary
+    backend = Column(String, nullable=False)
+    model = Column(String, nullable=False)
+    params = Column(String, nullable=False, default="{}")
+
+    summary = Column(Text, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    last_used_at = Column(DateTime, default=datetime.utcnow, index=True)
@@ -13,6 +13,8 @@ class User(Base):
     email = Column(String, unique=True, index=True, nullable=False)
     hashed_password = Column(String, nullable=False)
     role = Column(String, nullable=False)
+    # bumped to revoke every issued token (also on role change, since tokens carry the role)
+    token_version = Column(Integer, nullable=False, default=0, server_default="0")
 
     documents = relationship("Document", back_populates="user")
     document_access = relationship("DocumentAccess", back_populates="user", foreign_keys="DocumentAccess.user_id")
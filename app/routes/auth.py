@@ -3,11 +3,15 @@ from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
 from sqlalchemy.orm import Session
-from app.utils import get_password_hash
+from starlette.concurrency import run_in_threadpool
 from app.database import get_db
 from app.models.user import User
 from app.schemas.user import UserCreate, UserOut, UserLogin ,UserResponse
-from app.core.security import hash_password, verify_password
+from app.core.security import ahash_password, averify_password
+from app.services.auth_service import (
+    Principal, cached_principal, cache_principal, load_principal,
+    token_claims, remember_token_version, token_version_is_current,
+)
 
 router = APIRouter(tags=["Authentication"])
 
@@ -25,18 +29,26 @@ def create_access_token(data: dict, expires_delta: timedelta = None):
     return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
 
 # ------------------- REGISTER -------------------
-@router.post("/register", response_model=UserResponse)
-def register(user: UserCreate, db: Session = Depends(get_db)):
+def _check_new_user(db: Session, user: UserCreate):
     # Check if username exists
     if db.query(User).filter(User.username == user.username).first():
         raise HTTPException(status_code=400, detail="Username already exists")
-    
+
     # Check if email exists
     if db.query(User).filter(User.email == user.email).first():
         raise HTTPException(status_code=400, detail="Email already registered")
 
-    # Hash password
-    hashed_password = get_password_hash(user.password)
+def _save_user(db: Session, new_user: User):
+    db.add(new_user)
+    db.commit()
+    db.refresh(new_user)
+
+@router.post("/register", response_model=UserResponse)
+async def register(user: UserCreate, db: Session = Depends(get_db)):
+    await run_in_threadpool(_check_new_user, db, user)
+
+    # Hash password (in the bcrypt worker pool, off the event loop)
+    hashed_password = await ahash_password(user.password)
 
     # Create new user
     new_user = User(
@@ -46,10 +58,7 @@ def register(user: UserCreate, db: Session = Depends(get_db)):
         role=user.role,
         hashed_password=hashed_password
     )
-
-    db.add(new_user)
-    db.commit()
-    db.refresh(new_user)
+    await run_in_threadpool(_save_user, db, new_user)
 
     # Return UserResponse schema
     return UserResponse(
@@ -59,16 +68,32 @@ def register(user: UserCreate, db: Session = Depends(get_db)):
     )
 
 # ------------------- LOGIN -------------------
+def _find_user(db: Session, username: str):
+    return db.query(User).filter(User.username == username).first()
+
+def _update_password_hash(db: Session, db_user: User, hashed_password: str):
+    db_user.hashed_password = hashed_password
+    db.commit()
+
 @router.post("/login")
-def login(payload: UserLogin, db: Session = Depends(get_db)):
-    db_user = db.query(User).filter(User.username == payload.username).first()
-    if not db_user or not verify_password(payload.password, db_user.hashed_password):
+async def login(payload: UserLogin, db: Session = Depends(get_db)):
+    db_user = await run_in_threadpool(_find_user, db, payload.username)
+    valid, needs_rehash = (False, False)
+    if db_user:
+        valid, needs_rehash = await averify_password(payload.password, db_user.hashed_password)
+    if not valid:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid username or password",
         )
 
-    token = create_access_token({"sub": str(db_user.id)})
+    if needs_rehash:
+        # stored hash uses an old cost (BCRYPT_ROUNDS changed): upgrade it while we have the password
+        new_hash = await ahash_password(payload.password)
+        await run_in_threadpool(_update_password_hash, db, db_user, new_hash)
+
+    token = create_access_token(token_claims(db_user))
+    remember_token_version(db_user.id, db_user.token_version or 0)
     return {
         "access_token": token,
         "token_type": "bearer",
@@ -77,23 +102,43 @@ def login(payload: UserLogin, db: Session = Depends(get_db)):
     }
 
 # ------------------- GET CURRENT USER -------------------
-def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
+def _decode_token(token: str) -> dict:
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        user_id: str = payload.get("sub")
-        if user_id is None:
+        if payload.get("sub") is None:
             raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token")
     except JWTError:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token")
+    return payload
+
 
-    user = db.query(User).filter(User.id == int(user_id)).first()
-    if user is None:
-        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found")
-    return user
+def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)) -> Principal:
+    principal = cached_principal(token)
+    if principal is not None:
+        return principal
+
+    payload = _decode_token(token)
+    principal = load_principal(db, int(payload["sub"]), payload.get("ver", 0))
+    if principal is None:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found or token revoked")
+    cache_principal(token, principal, payload.get("exp"))
+    return principal
+
+
+def get_token_principal(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)) -> Principal:
+    """
+    Authorization from the signed role claim alone, for read paths that only need id + role.
+    Falls back to get_current_user (a DB read) when the token has no role claim or its
+    version has not been confirmed recently.
+    """
+    payload = _decode_token(token)
+    if "role" in payload and token_version_is_current(int(payload["sub"]), payload.get("ver", 0)):
+        return Principal.from_claims(payload)
+    return get_current_user(token, db)
 
 # ------------------- /me Route -------------------
 @router.get("/me", response_model=UserOut)
-def read_current_user(current_user: User = Depends(get_current_user)):
+def read_current_user(current_user: Principal = Depends(get_current_user)):
     """
     Return the currently authenticated user.
     Fully robust: ensures all fields exist for UserOut.
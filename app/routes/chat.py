@@ -0,0 +1,30 @@
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+from app.database import get_db
+from app.routes.auth import get_current_user, get_token_principal
+from app.services.auth_service import Principal
+from app.routes.document import SENIOR_ROLES
+from app.schemas.chat import ChatRequest, ChatResponse
+from app.services.visibility_service import visible_document_ids
+from mychatbot.chatbot import achatbot_response
+from mychatbot.model_server import model_server
+from mychatbot.rasa_client import breaker
+
+router = APIRouter(tags=["Chatbot"])
+
+# ---------------- Chat ----------------
+@router.post("", response_model=ChatResponse)
+async def chat(payload: ChatRequest, db: Session = Depends(get_db), current_user: Principal = Depends(get_current_user)):
+    # Retrieval only sees documents this user may open; the role keys the retrieval cache
+    role = None if current_user.role in SENIOR_ROLES else current_user.role
+    allowed = await run_in_threadpool(visible_document_ids, db, role)
+    return await achatbot_response(payload.message, allowed, access_key=role or "*", sender=str(current_user.id))
+
+
+@router.get("/metrics")
+def chat_metrics(current_user: Principal = Depends(get_token_principal)):
+    """Batching/throughput counters of the local model server and the Rasa circuit state (admins only)."""
+    if current_user.role != "Admin":
+        raise HTTPException(status_code=403, detail="Only admins can view metrics.")
+    return {**model_server.stats(), "rasa_circuit": breaker.state, "rasa_failures": breaker.failures}
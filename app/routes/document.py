@@ -1,14 +1,33 @@
-from fastapi import APIRouter, Depends, UploadFile, File, Form, HTTPException
+from fastapi import APIRouter, Depends, UploadFile, File, Form, HTTPException, BackgroundTasks, Query, Request, Response
 from fastapi.responses import FileResponse, JSONResponse
+from sqlalchemy import select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-import shutil, os, uuid
+import os
+import time
+import base64
+from contextlib import nullcontext
 from datetime import datetime
+from typing import Optional
 import json
-from app.database import get_db
+from app.database import get_db, get_async_db
 from app.models.document import Document
 from app.models.user import User
 from app.models.document_access import DocumentAccess
-from app.routes.auth import get_current_user
+from app.routes.auth import get_current_user, get_token_principal
+from app.services.auth_service import Principal
+from app.services.ai_helpers import invalidate_summaries
+from app.services.document_service import (
+    save_upload, discard_upload, put_blob, release_blob, blob_lock, ablob_lock, blob_path, file_sha256,
+)
+from app.services.preview_service import PREVIEW_VERSION, generate_preview, get_thumbnail_path
+from app.core.security import DOWNLOAD_URL_TTL, sign_download, verify_download_signature
+from app.services.search_service import index_document_text, search_documents
+from app.services.visibility_service import (
+    visible_document_ids, visible_documents_filter, can_view, set_document_visibility, clear_document_visibility,
+)
+from app.services.semantic_search import index_document_embeddings, remove_document_embeddings, semantic_search
+from mychatbot.chatbot import clear_retrieval_cache
 
 router = APIRouter(prefix="/documents", tags=["Documents"])
 
@@ -27,13 +46,14 @@ SENIOR_ROLES = {
 # ---------------- Upload ----------------
 @router.post("/upload")
 async def upload_document(
+    background_tasks: BackgroundTasks,
     file: UploadFile = File(...),
     title: str = Form(None),
     description: str = Form(""),
     department: str = Form("General"),
     access_roles: str = Form("All Employees"),  # comes as JSON list or string
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
 ):
     if current_user.role not in SENIOR_ROLES:
         raise HTTPException(status_code=403, detail="You are not allowed to upload documents.")
@@ -45,33 +65,47 @@ async def upload_document(
     except:
         roles = [str(access_roles)]
 
-    # Save file
-    original_name = os.path.basename(file.filename) or "file"
-    unique_name = f"{uuid.uuid4().hex}_{original_name}"
-    file_path = os.path.join(UPLOAD_DIR, unique_name)
-    with open(file_path, "wb") as buffer:
-        shutil.copyfileobj(file.file, buffer)
-
-    # Document
-    new_doc = Document(
-        title=title or original_name,
-        description=description,
-        file_path=file_path,
-        filename=original_name,
-        user_id=current_user.id,
-        department=department,
-        access_role="All Employees" if "All Employees" in roles else "Custom",
-        uploaded_at=datetime.utcnow(),
-    )
-    db.add(new_doc)
-    db.commit()
+    # Save file into the content-addressed blob store (streamed, hashed, size-checked)
+    original_name = os.path.basename(file.filename or "") or "file"
+    tmp_path, content_hash, file_size = await save_upload(file)
+    try:
+        # publish the blob and commit its document under the hash's lock, so a concurrent
+        # delete of another document with this content cannot unlink the blob in between
+        async with ablob_lock(content_hash):
+            file_path = put_blob(tmp_path, content_hash, original_name)
+
+            # Document
+            new_doc = Document(
+                title=title or original_name,
+                description=description,
+                file_path=file_path,
+                filename=original_name,
+                content_hash=content_hash,
+                file_size=file_size,
+                user_id=current_user.id,
+                department=department,
+                access_role="All Employees" if "All Employees" in roles else "Custom",
+                uploaded_at=datetime.utcnow(),
+            )
+            db.add(new_doc)
+            db.flush()
+
+            # If not All Employees → store allowed roles
+            if "All Employees" not in roles:
+                for role in roles:
+                    db.add(DocumentAccess(doc_id=new_doc.id, role=role))
+            # materialized visibility rows go in the same transaction as the document
+            set_document_visibility(db, new_doc.id, new_doc.access_role, roles)
+            db.commit()
+    finally:
+        discard_upload(tmp_path)
     db.refresh(new_doc)
 
-    # If not All Employees → store allowed roles
-    if "All Employees" not in roles:
-        for role in roles:
-            db.add(DocumentAccess(document_id=new_doc.id, role=role))
-        db.commit()
+    # Build the full-text index entry after the response is sent
+    background_tasks.add_task(index_document_text, new_doc.id)
+    background_tasks.add_task(index_document_embeddings, new_doc.id)
+    background_tasks.add_task(clear_retrieval_cache)   # chat answers may now cite the new document
+    background_tasks.add_task(generate_preview, file_path, original_name, content_hash)
 
     return {
         "msg": "✅ Document uploaded",
@@ -88,34 +122,137 @@ async def upload_document(
 
 
 # ---------------- List ----------------
+# fields= name -> column; "uploaded_by" comes from a join, so listing never lazy-loads users
+LIST_FIELDS = {
+    "id": Document.id,
+    "filename": Document.filename,
+    "title": Document.title,
+    "description": Document.description,
+    "department": Document.department,
+    "access_role": Document.access_role,
+    "uploaded_by": User.username,
+    "uploaded_at": Document.uploaded_at,
+}
+LIST_DEFAULTS = {"description": "", "department": "General", "access_role": "Restricted", "uploaded_by": "Unknown"}
+
+
+def encode_cursor(uploaded_at: Optional[datetime], doc_id: int) -> str:
+    raw = json.dumps([uploaded_at.isoformat() if uploaded_at else None, doc_id])
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[Optional[datetime], int]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        uploaded_at, doc_id = json.loads(raw)
+        return (datetime.fromisoformat(uploaded_at) if uploaded_at else None), int(doc_id)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
 @router.get("/list")
-def list_documents(db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
-    if current_user.role in SENIOR_ROLES:
-        docs = db.query(Document).all()
-    else:
-        docs = (
-            db.query(Document)
-            .outerjoin(DocumentAccess)
-            .filter(
-                (Document.access_role == "All Employees") |
-                (DocumentAccess.role == current_user.role)
-            )
-            .all()
-        )
+async def list_documents(
+    response: Response,
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor of the previous page"),
+    limit: int = Query(100, ge=1, le=500),
+    fields: Optional[str] = Query(None, description="Comma-separated subset of fields to return"),
+    department: Optional[str] = None,
+    access_role: Optional[str] = None,
+    uploaded_after: Optional[datetime] = None,
+    uploaded_before: Optional[datetime] = None,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_token_principal),
+):
+    """
+    Newest-first page of visible documents. Keyset pagination on (uploaded_at, id) keeps every
+    page an index range scan; the next page's cursor is returned in the X-Next-Cursor header.
+    The dashboard polls this route, so its queries are awaited instead of holding a threadpool worker.
+    """
+    names = list(LIST_FIELDS)
+    if fields:
+        names = [f.strip() for f in fields.split(",") if f.strip()]
+        unknown = set(names) - set(LIST_FIELDS)
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(sorted(unknown))}")
 
-    return [
-        {
-            "id": d.id,
-            "filename": d.filename,
-            "title": d.title,
-            "description": d.description or "",
-            "department": d.department or "General",
-            "access_role": d.access_role or "Restricted",
-            "uploaded_by": d.user.username if d.user else "Unknown",
-            "uploaded_at": d.uploaded_at.isoformat() if d.uploaded_at else None,
-        }
-        for d in docs
-    ]
+    # id + uploaded_at are always selected: the cursor is built from them
+    columns = [Document.id.label("_id"), Document.uploaded_at.label("_uploaded_at")]
+    columns += [LIST_FIELDS[name].label(name) for name in names]
+    query = select(*columns).select_from(Document)
+    if "uploaded_by" in names:
+        query = query.outerjoin(User, User.id == Document.user_id)
+
+    if current_user.role not in SENIOR_ROLES:
+        query = query.where(visible_documents_filter(current_user.role))
+    if department:
+        query = query.where(Document.department == department)
+    if access_role:
+        query = query.where(Document.access_role == access_role)
+    if uploaded_after:
+        query = query.where(Document.uploaded_at >= uploaded_after)
+    if uploaded_before:
+        query = query.where(Document.uploaded_at < uploaded_before)
+
+    # Dated rows page by the (uploaded_at, id) row value, which is one index range scan;
+    # legacy rows without uploaded_at follow them, paged by id alone.
+    after_at, after_id = decode_cursor(cursor) if cursor else (None, None)
+    rows = []
+    if after_at is not None or after_id is None:
+        dated = query.where(Document.uploaded_at.isnot(None))
+        if after_at is not None:
+            dated = dated.where(tuple_(Document.uploaded_at, Document.id) < tuple_(after_at, after_id))
+        dated = dated.order_by(Document.uploaded_at.desc(), Document.id.desc()).limit(limit + 1)
+        rows = (await db.execute(dated)).all()
+    if len(rows) <= limit:
+        undated = query.where(Document.uploaded_at.is_(None))
+        if after_at is None and after_id is not None:
+            undated = undated.where(Document.id < after_id)
+        undated = undated.order_by(Document.id.desc()).limit(limit + 1 - len(rows))
+        rows += (await db.execute(undated)).all()
+
+    if len(rows) > limit:
+        rows = rows[:limit]
+        response.headers["X-Next-Cursor"] = encode_cursor(rows[-1]._uploaded_at, rows[-1]._id)
+
+    page = []
+    for row in rows:
+        item = {}
+        for name in names:
+            value = getattr(row, name)
+            if name == "uploaded_at":
+                value = value.isoformat() if value else None
+            item[name] = value or LIST_DEFAULTS.get(name, value)
+        page.append(item)
+    return page
+
+
+# ---------------- Search ----------------
+@router.get("/search")
+def search(
+    q: str = Query(..., min_length=1, max_length=200),
+    limit: int = Query(20, ge=1, le=100),
+    db: Session = Depends(get_db),
+    current_user: Principal = Depends(get_current_user),
+):
+    # Senior roles see everything; others get visibility rules applied inside the query
+    role = None if current_user.role in SENIOR_ROLES else current_user.role
+    return search_documents(db, q, role, limit)
+
+
+@router.get("/semantic-search")
+def semantic_search_documents(
+    q: str = Query(..., min_length=1, max_length=500),
+    k: int = Query(10, ge=1, le=50),
+    db: Session = Depends(get_db),
+    current_user: Principal = Depends(get_current_user),
+):
+    # Restrict the vector scan to documents this role may open (None = senior, unrestricted)
+    role = None if current_user.role in SENIOR_ROLES else current_user.role
+    hits = semantic_search(q, k, visible_document_ids(db, role))
+    titles = dict(
+        db.query(Document.id, Document.title).filter(Document.id.in_({h["doc_id"] for h in hits})).all()
+    ) if hits else {}
+    return [{**h, "title": titles.get(h["doc_id"])} for h in hits]
 
 
 # ---------------- Delete ----------------
@@ -123,7 +260,7 @@ def list_documents(db: Session = Depends(get_db), current_user: User = Depends(g
 def delete_document(
     doc_id: int,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
 ):
     # Only senior roles allowed to delete
     if current_user.role not in SENIOR_ROLES:
@@ -133,41 +270,173 @@ def delete_document(
     if not doc:
         raise HTTPException(status_code=404, detail="Document not found")
 
-    # Remove file from disk (ignore errors)
-    if doc.file_path and os.path.exists(doc.file_path):
-        try:
-            os.remove(doc.file_path)
-        except Exception:
-            pass
-
     # Delete DB record (DocumentAccess rows should be removed by cascade)
+    file_path, content_hash = doc.file_path, doc.content_hash
+    invalidate_summaries(db, doc.id)
+    clear_document_visibility(db, doc.id)
     db.delete(doc)
     db.commit()
 
+    # Blobs are shared by identical uploads: only unlink when this was the last reference.
+    # The lock makes an upload of the same content either commit before the count or
+    # publish the blob again after the unlink.
+    # (Files from before the blob store have no content hash and are never shared.)
+    with blob_lock(content_hash) if content_hash else nullcontext():
+        remaining_refs = db.query(Document).filter(Document.file_path == file_path).count()
+        release_blob(file_path, remaining_refs)
+    remove_document_embeddings(doc_id)
+    clear_retrieval_cache()   # cached chat retrievals may still hold its chunks
+
     return {"msg": "✅ Document deleted successfully"}
 
 
 
 # ---------------- Download ----------------
-@router.get("/{doc_id}")
-def get_document(doc_id: int, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
-    doc = db.query(Document).filter(Document.id == doc_id).first()
+class RangeFileResponse(FileResponse):
+    """
+    FileResponse whose multi-range (206 multipart/byteranges) replies name the boundary in
+    Content-Type; Starlette 0.47 puts it in Content-Range, which clients cannot parse.
+    """
+
+    async def _handle_multiple_ranges(self, send, ranges, file_size, send_header_only):
+        async def send_fixed(message):
+            if message["type"] == "http.response.start" and "content-range" in self.headers:
+                self.headers["content-type"] = self.headers["content-range"]
+                del self.headers["content-range"]
+                message = {**message, "headers": self.raw_headers}
+            await send(message)
+
+        await super()._handle_multiple_ranges(send_fixed, ranges, file_size, send_header_only)
+
+
+def etag_for(content_hash: str) -> str:
+    # strong validator: the blob is content-addressed, so its sha256 identifies the exact bytes
+    return f'"{content_hash}"'
+
+
+def if_none_match(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    return header.strip() == "*" or etag in [t.strip().removeprefix("W/") for t in header.split(",")]
+
+
+def download_response(request: Request, file_path: str, filename: str, content_hash: Optional[str]):
+    """
+    304 when the client already holds this content, otherwise a FileResponse: Starlette serves
+    single and multi-part Range requests (honouring If-Range against the ETag) and hands the
+    file to the server via http.response.pathsend when the ASGI server supports it.
+    """
+    headers = {"Cache-Control": "private, no-cache"}   # revalidate each time: access can change
+    if content_hash:
+        headers["ETag"] = etag_for(content_hash)
+        if if_none_match(request, headers["ETag"]):
+            return Response(status_code=304, headers=headers)
+
+    if not os.path.exists(file_path):
+        raise HTTPException(status_code=404, detail="File missing on server")
+    return RangeFileResponse(path=file_path, filename=filename or os.path.basename(file_path), headers=headers)
+
+
+def visible_document(db: Session, current_user: Principal, doc_id: int):
+    """(file_path, filename, content_hash) of a document the user may open; 404/403 otherwise."""
+    doc = (
+        db.query(Document.file_path, Document.filename, Document.content_hash)
+        .filter(Document.id == doc_id)
+        .first()
+    )
     if not doc:
         raise HTTPException(status_code=404, detail="Document not found")
 
-    if current_user.role not in SENIOR_ROLES:
-        if doc.access_role != "All Employees":
-            allowed = db.query(DocumentAccess).filter(
-                DocumentAccess.document_id == doc_id,
-                DocumentAccess.role == current_user.role
-            ).first()
-            if not allowed:
-                raise HTTPException(status_code=403, detail="You do not have access to this document")
+    if current_user.role not in SENIOR_ROLES and not can_view(db, current_user.role, doc_id):
+        raise HTTPException(status_code=403, detail="You do not have access to this document")
+    return doc
+
+
+# Signed URLs: the access check runs once when the URL is minted; fetching it (and every
+# Range request a PDF viewer makes) only verifies the HMAC. Blobs are content-addressed, so
+# the file path follows from the signed hash + filename without a DB lookup.
+@router.get("/signed", name="download_signed")
+def download_signed(request: Request, h: str, name: str, exp: int, sig: str):
+    if not verify_download_signature(h, name, exp, sig):
+        raise HTTPException(status_code=403, detail="Download link is invalid or has expired")
+    return download_response(request, blob_path(h, name), name, h)
+
+
+@router.get("/{doc_id}/download-url")
+def create_download_url(
+    doc_id: int,
+    request: Request,
+    ttl: int = Query(DOWNLOAD_URL_TTL, ge=1, le=3600),
+    db: Session = Depends(get_db),
+    current_user: Principal = Depends(get_token_principal),
+):
+    doc = visible_document(db, current_user, doc_id)
+
+    if not doc.content_hash or os.path.normpath(doc.file_path) != os.path.normpath(blob_path(doc.content_hash, doc.filename)):
+        raise HTTPException(status_code=409, detail="Document is not in the blob store yet (run migrate_blobs.py)")
+
+    expires = int(time.time()) + ttl
+    url = request.url_for("download_signed").include_query_params(
+        h=doc.content_hash, name=doc.filename, exp=expires, sig=sign_download(doc.content_hash, doc.filename, expires)
+    )
+    return {"url": str(url), "expires_at": datetime.utcfromtimestamp(expires).isoformat()}
 
+
+# ---------------- Previews ----------------
+def _preview_source(doc):
     if not os.path.exists(doc.file_path):
         raise HTTPException(status_code=404, detail="File missing on server")
+    return doc.file_path, doc.filename, doc.content_hash or file_sha256(doc.file_path)
+
+
+@router.get("/{doc_id}/preview")
+def get_document_preview(
+    doc_id: int,
+    request: Request,
+    db: Session = Depends(get_db),
+    current_user: Principal = Depends(get_token_principal),
+):
+    preview = generate_preview(*_preview_source(visible_document(db, current_user, doc_id)))
+    return {
+        "teaser": preview["teaser"],
+        "thumbnail_url": str(request.url_for("get_document_thumbnail", doc_id=doc_id)) if preview["has_thumbnail"] else None,
+    }
+
+
+@router.get("/{doc_id}/thumbnail", name="get_document_thumbnail")
+def get_document_thumbnail(
+    doc_id: int,
+    request: Request,
+    db: Session = Depends(get_db),
+    current_user: Principal = Depends(get_token_principal),
+):
+    """
+    JPEG of the first page: rendered with PyMuPDF for PDFs, the embedded thumbnail for
+    DOCX/PPTX/XLSX. Without PyMuPDF, or when there is no embedded image, the thumbnail is
+    a card showing the title and opening text.
+    """
+    file_path, filename, content_hash = _preview_source(visible_document(db, current_user, doc_id))
+    # thumbnails of a given content never change: let the browser keep them for a day
+    headers = {"Cache-Control": "private, max-age=86400", "ETag": etag_for(f"{content_hash}-thumb-v{PREVIEW_VERSION}")}
+    if if_none_match(request, headers["ETag"]):
+        return Response(status_code=304, headers=headers)
+    path = get_thumbnail_path(file_path, filename, content_hash)
+    if path is None:
+        raise HTTPException(status_code=404, detail="No preview available (install Pillow)")
+    return FileResponse(path, media_type="image/jpeg", headers=headers)
+
+
+@router.get("/{doc_id}")
+def get_document(
+    doc_id: int,
+    request: Request,
+    db: Session = Depends(get_db),
+    current_user: Principal = Depends(get_token_principal),
+):
+    doc = visible_document(db, current_user, doc_id)
 
-    return FileResponse(path=doc.file_path, filename=os.path.basename(doc.file_path))
+    return download_response(request, doc.file_path, doc.filename, doc.content_hash)
 
 
 
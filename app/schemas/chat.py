@@ -0,0 +1,13 @@
+from pydantic import BaseModel, Field
+
+# ------------------- Input Schemas -------------------
+
+class ChatRequest(BaseModel):
+    message: str = Field(..., min_length=1, max_length=2000)
+
+# ------------------- Output Schemas -------------------
+
+class ChatResponse(BaseModel):
+    reply: str
+    source: str                 # "documents" | "rasa" | "llm"
+    citations: list[int] = []   # ids of documents the answer was drawn from
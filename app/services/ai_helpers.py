@@ -0,0 +1,386 @@
+# app/services/ai_helpers.py
+import os
+import re
+import json
+import asyncio
+from datetime import datetime, timedelta
+from typing import AsyncIterator, Callable, Optional
+
+import httpx
+from dotenv import load_dotenv
+from sqlalchemy.orm import Session
+
+from app.models.summary_cache import SummaryCache
+
+load_dotenv()
+
+HF_API_KEY = os.getenv("HF_API_KEY")        # Hugging Face token (preferred for quick integration)
+HF_MODEL = os.getenv("HF_MODEL", "sshleifer/distilbart-cnn-12-6")  # default HF model for summarization
+HF_PARAMS = {"max_length": 130, "min_length": 30}
+OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
+OPENAI_BASE_URL = os.getenv("OPENAI_BASE_URL")  # point at any OpenAI-compatible server, e.g. a local fake
+OPENAI_MODEL = os.getenv("OPENAI_MODEL", "gpt-4o-mini")
+OPENAI_PARAMS = {"max_completion_tokens": 250}
+
+# Long documents are split into model-sized windows, summarized concurrently (map)
+# and the partial summaries summarized again (reduce). distilbart truncates around
+# 1024 tokens, i.e. roughly 3000 characters of English text.
+HF_CHUNK_CHARS = int(os.getenv("HF_CHUNK_CHARS", "3000"))
+OPENAI_CHUNK_CHARS = int(os.getenv("OPENAI_CHUNK_CHARS", "24000"))
+SUMMARY_CONCURRENCY = int(os.getenv("SUMMARY_CONCURRENCY", "4"))
+MAX_REDUCE_ROUNDS = 3
+
+# Cache keys include the chunk size, since it changes the produced summary
+HF_CACHE_PARAMS = {**HF_PARAMS, "chunk_chars": HF_CHUNK_CHARS}
+OPENAI_CACHE_PARAMS = {**OPENAI_PARAMS, "chunk_chars": OPENAI_CHUNK_CHARS}
+
+# One pooled async HTTP client shared by every HF/OpenAI call in this process
+HTTP_TIMEOUT = httpx.Timeout(float(os.getenv("AI_HTTP_TIMEOUT", "30")), connect=5.0)
+HTTP_LIMITS = httpx.Limits(
+    max_connections=int(os.getenv("AI_HTTP_MAX_CONNECTIONS", "20")),
+    max_keepalive_connections=int(os.getenv("AI_HTTP_MAX_KEEPALIVE", "10")),
+)
+_http_client: Optional[httpx.AsyncClient] = None
+_openai_client = None
+
+# Persisted summary cache: entries expire after a TTL and the least recently used
+# entries are evicted once the table grows past SUMMARY_CACHE_MAX_ENTRIES.
+SUMMARY_CACHE_TTL = timedelta(hours=float(os.getenv("SUMMARY_CACHE_TTL_HOURS", "168")))
+SUMMARY_CACHE_MAX_ENTRIES = int(os.getenv("SUMMARY_CACHE_MAX_ENTRIES", "1000"))
+
+
+def _params_key(params: dict) -> str:
+    """Stable string form of backend parameters so equal dicts map to the same cache key."""
+    return json.dumps(params or {}, sort_keys=True, separators=(",", ":"))
+
+
+# ---------------- Shared clients ----------------
+def get_http_client() -> httpx.AsyncClient:
+    """Return the process-wide pooled AsyncClient, creating it on first use."""
+    global _http_client
+    if _http_client is None or _http_client.is_closed:
+        _http_client = httpx.AsyncClient(timeout=HTTP_TIMEOUT, limits=HTTP_LIMITS)
+    return _http_client
+
+
+def get_openai_client():
+    """AsyncOpenAI client sharing the pooled HTTP client, or None when no key is configured."""
+    global _openai_client
+    if not OPENAI_API_KEY:
+        return None
+    if _openai_client is None:
+        # only import OpenAI client if user provided a key (safe init)
+        from openai import AsyncOpenAI
+        _openai_client = AsyncOpenAI(
+            api_key=OPENAI_API_KEY,
+            base_url=OPENAI_BASE_URL or None,
+            http_client=get_http_client(),
+        )
+    return _openai_client
+
+
+async def close_http_client() -> None:
+    global _http_client, _openai_client
+    if _http_client is not None:
+        await _http_client.aclose()
+    _http_client = None
+    _openai_client = None
+
+
+# ---------------- Summarization backends ----------------
+def mock_summary(text: str) -> str:
+    """Very small fallback summarizer: take first 2-3 sentences."""
+    sentences = re.split(r'(?<=[.!?])\s+', text.strip())
+    return " ".join(sentences[:3]) if sentences else ""
+
+
+def chunk_text(text: str, max_chars: int) -> list[str]:
+    """
+    Split text into windows of at most max_chars, breaking on paragraph boundaries,
+    then sentence boundaries, and only as a last resort mid-sentence.
+    """
+    pieces = []
+    for paragraph in re.split(r"\n\s*\n", text):
+        paragraph = paragraph.strip()
+        if not paragraph:
+            continue
+        if len(paragraph) <= max_chars:
+            pieces.append(paragraph)
+            continue
+        for sentence in re.split(r'(?<=[.!?])\s+', paragraph):
+            while len(sentence) > max_chars:
+                pieces.append(sentence[:max_chars])
+                sentence = sentence[max_chars:]
+            if sentence:
+                pieces.append(sentence)
+
+    # greedily pack pieces back together up to the window size
+    chunks, current = [], ""
+    for piece in pieces:
+        if current and len(current) + len(piece) + 2 > max_chars:
+            chunks.append(current)
+            current = piece
+        else:
+            current = f"{current}\n\n{piece}" if current else piece
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+ProgressCallback = Callable[[int, int], None]
+
+
+async def reduce_to_window(
+    text: str,
+    summarize_chunk,
+    max_chars: int,
+    on_progress: Optional[ProgressCallback] = None,
+) -> Optional[str]:
+    """
+    Map step of map-reduce: while text is longer than one window, summarize its chunks
+    concurrently (bounded by SUMMARY_CONCURRENCY) and join the partial summaries.
+    Returns text that fits one window, or None if any call fails.
+    on_progress(done, total) is called as first-round chunks complete.
+    """
+    for round_no in range(MAX_REDUCE_ROUNDS):
+        chunks = chunk_text(text, max_chars)
+        if len(chunks) <= 1:
+            return chunks[0] if chunks else None
+
+        semaphore = asyncio.Semaphore(SUMMARY_CONCURRENCY)
+        done = 0
+
+        async def run(chunk: str) -> Optional[str]:
+            nonlocal done
+            async with semaphore:
+                result = await summarize_chunk(chunk)
+            done += 1
+            if on_progress and round_no == 0:
+                on_progress(done, len(chunks))
+            return result
+
+        partials = await asyncio.gather(*(run(c) for c in chunks))
+        if any(not p for p in partials):
+            return None
+        text = "\n\n".join(partials)
+
+    # summaries are not shrinking enough; keep what fits instead of looping forever
+    chunks = chunk_text(text, max_chars)
+    return chunks[0] if chunks else None
+
+
+async def map_reduce_summarize(
+    text: str,
+    summarize_chunk,
+    max_chars: int,
+    on_progress: Optional[ProgressCallback] = None,
+) -> Optional[str]:
+    """
+    Summarize text of any length with summarize_chunk (an async callable returning str or None):
+    reduce it to one window with reduce_to_window(), then summarize that. None if any call fails.
+    """
+    window = await reduce_to_window(text, summarize_chunk, max_chars, on_progress)
+    if not window:
+        return None
+    return await summarize_chunk(window)
+
+
+async def _hf_summarize_chunk(text: str) -> Optional[str]:
+    """Single Hugging Face Inference API call; return summary string or None on failure."""
+    url = f"https://api-inference.huggingface.co/models/{HF_MODEL}"
+    headers = {"Authorization": f"Bearer {HF_API_KEY}"}
+    payload = {
+        "inputs": text,
+        "parameters": HF_PARAMS,
+    }
+    try:
+        resp = await get_http_client().post(url, headers=headers, json=payload)
+    except Exception:
+        # network, DNS or timeout error
+        return None
+
+    if resp.status_code != 200:
+        # non-200 => treat as failure (caller may fallback)
+        return None
+
+    try:
+        data = resp.json()
+        # HF model usually returns [{'summary_text': '...'}] for summarization models
+        if isinstance(data, list) and isinstance(data[0], dict) and "summary_text" in data[0]:
+            return data[0]["summary_text"]
+        # some models return plain text or different schema; attempt to handle common cases
+        if isinstance(data, dict) and "summary_text" in data:
+            return data["summary_text"]
+        if isinstance(data, list) and isinstance(data[0], str):
+            return data[0]
+        # otherwise return stringified response
+        return str(data)
+    except Exception:
+        return None
+
+
+async def summarize_with_hf(text: str, on_progress: Optional[ProgressCallback] = None) -> Optional[str]:
+    """Summarize with Hugging Face (map-reduce over model-sized chunks); None on failure."""
+    if not HF_API_KEY:
+        return None
+    return await map_reduce_summarize(text, _hf_summarize_chunk, HF_CHUNK_CHARS, on_progress)
+
+
+async def _openai_summarize_chunk(text: str) -> Optional[str]:
+    """Single OpenAI chat completion; returns summary or None on error."""
+    try:
+        response = await get_openai_client().chat.completions.create(
+            model=OPENAI_MODEL,
+            messages=[
+                {"role": "system", "content": "You are a helpful assistant that summarizes documents."},
+                {"role": "user", "content": f"Summarize the following document:\n\n{text}"}
+            ],
+            **OPENAI_PARAMS
+        )
+        # Extract result (SDK may return nested structure)
+        return response.choices[0].message.content
+    except Exception:
+        # bubble up None to let caller fallback
+        return None
+
+
+async def summarize_with_openai(text: str, on_progress: Optional[ProgressCallback] = None) -> Optional[str]:
+    """Summarize with OpenAI if configured (map-reduce over long documents); None on error."""
+    if not get_openai_client():
+        return None
+    return await map_reduce_summarize(text, _openai_summarize_chunk, OPENAI_CHUNK_CHARS, on_progress)
+
+
+async def stream_with_openai(text: str) -> AsyncIterator[str]:
+    """
+    Yield summary tokens from OpenAI as they arrive. Long documents are reduced to one
+    window first (non-streamed map step) and only the final summary is streamed.
+    Yields nothing if OpenAI is not configured or the map step fails; errors raised
+    after the first token propagate to the caller.
+    """
+    client = get_openai_client()
+    if not client:
+        return
+    window = await reduce_to_window(text, _openai_summarize_chunk, OPENAI_CHUNK_CHARS)
+    if not window:
+        return
+    stream = await client.chat.completions.create(
+        model=OPENAI_MODEL,
+        messages=[
+            {"role": "system", "content": "You are a helpful assistant that summarizes documents."},
+            {"role": "user", "content": f"Summarize the following document:\n\n{window}"}
+        ],
+        stream=True,
+        **OPENAI_PARAMS
+    )
+    async for chunk in stream:
+        if chunk.choices and chunk.choices[0].delta.content:
+            yield chunk.choices[0].delta.content
+
+
+def summary_backends():
+    """Configured (backend, model, params) triples, in the order summaries are attempted."""
+    backends = []
+    if HF_API_KEY:
+        backends.append(("huggingface", HF_MODEL, HF_CACHE_PARAMS))
+    if OPENAI_API_KEY:
+        backends.append(("openai", OPENAI_MODEL, OPENAI_CACHE_PARAMS))
+    return backends
+
+
+# ---------------- Summary cache ----------------
+def get_cached_summary(
+    db: Session, doc_id: int, file_hash: str, backend: str, model: str, params: dict
+) -> Optional[str]:
+    """
+    Return a cached summary for this (file, backend, model, params) or None. Entries of this
+    document are preferred; identical content uploaded as another document shares the blob,
+    so its summary is reused too.
+    """
+    entry = (
+        db.query(SummaryCache)
+        .filter(
+            SummaryCache.file_hash == file_hash,
+            SummaryCache.backend == backend,
+            SummaryCache.model == model,
+            SummaryCache.params == _params_key(params),
+        )
+        .order_by((SummaryCache.doc_id == doc_id).desc())
+        .first()
+    )
+    if not entry:
+        return None
+
+    now = datetime.utcnow()
+    if entry.created_at and now - entry.created_at > SUMMARY_CACHE_TTL:
+        db.delete(entry)
+        db.commit()
+        return None
+
+    entry.last_used_at = now
+    db.commit()
+    return entry.summary
+
+
+def store_summary(
+    db: Session, doc_id: int, file_hash: str, backend: str, model: str, params: dict, summary: str
+) -> None:
+    """Persist a summary, dropping entries for older versions of the file and trimming the LRU tail."""
+    # The file behind this document was replaced: summaries of the old content are stale
+    db.query(SummaryCache).filter(
+        SummaryCache.doc_id == doc_id,
+        SummaryCache.file_hash != file_hash,
+    ).delete(synchronize_session=False)
+
+    params_key = _params_key(params)
+    entry = (
+        db.query(SummaryCache)
+        .filter(
+            SummaryCache.doc_id == doc_id,
+            SummaryCache.file_hash == file_hash,
+            SummaryCache.backend == backend,
+            SummaryCache.model == model,
+            SummaryCache.params == params_key,
+        )
+        .first()
+    )
+    now = datetime.utcnow()
+    if entry:
+        entry.summary = summary
+        entry.created_at = now
+        entry.last_used_at = now
+    else:
+        db.add(SummaryCache(
+            doc_id=doc_id,
+            file_hash=file_hash,
+            backend=backend,
+            model=model,
+            params=params_key,
+            summary=summary,
+            created_at=now,
+            last_used_at=now,
+        ))
+    db.commit()
+
+    _evict_summaries(db)
+
+
+def _evict_summaries(db: Session) -> None:
+    """Drop expired entries, then the least recently used ones above the size cap."""
+    db.query(SummaryCache).filter(
+        SummaryCache.created_at < datetime.utcnow() - SUMMARY_CACHE_TTL
+    ).delete(synchronize_session=False)
+
+    overflow = db.query(SummaryCache).count() - SUMMARY_CACHE_MAX_ENTRIES
+    if overflow > 0:
+        stale_ids = [
+            row.id
+            for row in db.query(SummaryCache.id).order_by(SummaryCache.last_used_at.asc()).limit(overflow)
+        ]
+        db.query(SummaryCache).filter(SummaryCache.id.in_(stale_ids)).delete(synchronize_session=False)
+    db.commit()
+
+
+def invalidate_summaries(db: Session, doc_id: int) -> None:
+    """Remove every cached summary of a document (call before deleting or replacing it; caller commits)."""
+    db.query(SummaryCache).filter(SummaryCache.doc_id == doc_id).delete(synchronize_session=False)
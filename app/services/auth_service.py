@@ -0,0 +1,132 @@
+# app/services/auth_service.py
+import os
+import time
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Optional
+
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+
+from app.models.user import User
+
+# token -> principal cache: repeat requests with the same bearer token skip the users query
+PRINCIPAL_CACHE_TTL = float(os.getenv("PRINCIPAL_CACHE_TTL", "60"))  # seconds
+PRINCIPAL_CACHE_SIZE = int(os.getenv("PRINCIPAL_CACHE_SIZE", "10000"))
+
+# How long a user's token_version, once read from the DB, is trusted for claims-only
+# authorization. Bounds how long a revocation made by another worker can go unnoticed.
+TOKEN_VERSION_TTL = float(os.getenv("TOKEN_VERSION_TTL", "60"))  # seconds
+
+
+@dataclass(frozen=True, slots=True)
+class Principal:
+    """Immutable snapshot of the authenticated user (safe to share between requests)."""
+    id: int
+    username: str
+    role: str
+    full_name: Optional[str] = None   # not in the token: None for claims-only principals
+    email: Optional[str] = None
+
+    @classmethod
+    def from_user(cls, user: User) -> "Principal":
+        return cls(id=user.id, username=user.username, role=user.role, full_name=user.full_name, email=user.email)
+
+    @classmethod
+    def from_claims(cls, payload: dict) -> "Principal":
+        return cls(id=int(payload["sub"]), username=payload.get("name", ""), role=payload["role"])
+
+
+def token_claims(user: User) -> dict:
+    """Claims for a user's access token: id, role and the token_version it was issued under."""
+    return {"sub": str(user.id), "name": user.username, "role": user.role, "ver": user.token_version or 0}
+
+
+# token -> (expires_at, principal), least recently used first
+_principals: OrderedDict = OrderedDict()
+_principals_lock = threading.Lock()
+
+
+def cached_principal(token: str) -> Optional[Principal]:
+    now = time.time()
+    with _principals_lock:
+        hit = _principals.get(token)
+        if hit is None:
+            return None
+        if hit[0] <= now:
+            del _principals[token]
+            return None
+        _principals.move_to_end(token)
+        return hit[1]
+
+
+def cache_principal(token: str, principal: Principal, token_exp: Optional[float] = None) -> None:
+    """Remember a principal for PRINCIPAL_CACHE_TTL seconds, never beyond the token's own expiry."""
+    expires_at = time.time() + PRINCIPAL_CACHE_TTL
+    if token_exp is not None:
+        expires_at = min(expires_at, token_exp)
+    with _principals_lock:
+        _principals[token] = (expires_at, principal)
+        _principals.move_to_end(token)
+        while len(_principals) > PRINCIPAL_CACHE_SIZE:
+            _principals.popitem(last=False)
+
+
+def load_principal(db: Session, user_id: int, token_version: int = 0) -> Optional[Principal]:
+    """Fetch a user; None if they no longer exist or the token was issued under an older token_version."""
+    user = db.query(User).filter(User.id == user_id).first()
+    if user is None:
+        return None
+    remember_token_version(user.id, user.token_version or 0)
+    if (user.token_version or 0) != token_version:
+        return None
+    return Principal.from_user(user)
+
+
+def invalidate_user(user_id: int) -> None:
+    """Drop every cached principal of a user (role change, rename, deletion)."""
+    with _principals_lock:
+        for token in [t for t, (_, p) in _principals.items() if p.id == user_id]:
+            del _principals[token]
+        _token_versions.pop(user_id, None)
+
+
+# ---------------- Token versions ----------------
+# user id -> (token_version, time it was read from the DB)
+_token_versions: dict = {}
+
+
+def remember_token_version(user_id: int, version: int) -> None:
+    _token_versions[user_id] = (version, time.time())
+
+
+def token_version_is_current(user_id: int, version: int) -> bool:
+    """True if version matches a recently confirmed token_version; False means "ask the DB"."""
+    known = _token_versions.get(user_id)
+    return known is not None and known[0] == version and time.time() - known[1] < TOKEN_VERSION_TTL
+
+
+def revoke_tokens(user: User) -> None:
+    """Invalidate all tokens issued to a user; the caller commits."""
+    user.token_version = (user.token_version or 0) + 1
+
+
+def clear_principal_cache() -> None:
+    with _principals_lock:
+        _principals.clear()
+
+
+# Tokens carry the role, so a role change revokes them (the user logs in again).
+@event.listens_for(User, "before_update")
+def _revoke_on_role_change(mapper, connection, target):
+    if inspect(target).attrs.role.history.has_changes():
+        target.token_version = (target.token_version or 0) + 1
+
+
+# Any ORM update/delete of a user drops their cached principals, so a changed role
+# takes effect on the next request instead of after the TTL.
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _invalidate_on_change(mapper, connection, target):
+    invalidate_user(target.id)
@@ -0,0 +1,254 @@
+# app/services/document_service.py
+import os
+import asyncio
+import hashlib
+import uuid
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager, contextmanager
+from typing import Optional
+
+import aiofiles
+from fastapi import HTTPException, UploadFile
+from starlette.concurrency import run_in_threadpool
+
+from app.core.file_lock import lock_file, unlock_file
+from app.services.extractors import iter_document_text, CUT_PAGES, PDF_MAX_PAGES
+
+# Extracted text is cached on disk, content-addressed by file hash + extractor version.
+# Bump EXTRACTOR_VERSION whenever extraction output changes so old entries are ignored.
+# Text cut at the PDF page cap is cached under a key naming the cap; text cut by the
+# (load-dependent) time budget is never cached.
+TEXT_CACHE_DIR = os.getenv("TEXT_CACHE_DIR", "text_cache")
+EXTRACTOR_VERSION = "2"
+os.makedirs(TEXT_CACHE_DIR, exist_ok=True)
+
+HASH_CHUNK_SIZE = 1024 * 1024
+
+# Uploaded files live in a content-addressed blob store: blobs/<h[:2]>/<sha256><ext>.
+# Identical uploads share one blob; Document.file_path points at it.
+BLOB_DIR = os.getenv("BLOB_DIR", os.path.join("uploaded_docs", "blobs"))
+os.makedirs(BLOB_DIR, exist_ok=True)
+# lock files serializing publish/unlink of a blob; hashes share 256 locks by prefix
+BLOB_LOCK_DIR = os.path.join(BLOB_DIR, ".locks")
+os.makedirs(BLOB_LOCK_DIR, exist_ok=True)
+
+# Uploads are copied to disk in chunks, hashed on the fly and capped in size
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+MAX_UPLOAD_BYTES = int(os.getenv("MAX_UPLOAD_BYTES", str(512 * 1024 * 1024)))
+
+# Dedicated pool for extraction so slow PDFs never starve the request threadpool
+EXTRACTION_WORKERS = int(os.getenv("EXTRACTION_WORKERS", str(min(4, os.cpu_count() or 1))))
+_extract_pool = ThreadPoolExecutor(max_workers=EXTRACTION_WORKERS, thread_name_prefix="extract")
+
+# (path, size, mtime) -> sha256, so an unchanged file is only hashed once per process;
+# least recently used first, capped at HASH_MEMO_SIZE entries
+HASH_MEMO_SIZE = int(os.getenv("HASH_MEMO_SIZE", "10000"))
+_hash_memo: OrderedDict = OrderedDict()
+_hash_memo_lock = threading.Lock()
+
+
+# ---------------- Hashing ----------------
+def file_sha256(file_path: str) -> str:
+    """Return the hex SHA-256 of a file, memoized on (path, size, mtime)."""
+    st = os.stat(file_path)
+    key = (os.path.abspath(file_path), st.st_size, st.st_mtime_ns)
+    with _hash_memo_lock:
+        cached = _hash_memo.get(key)
+        if cached:
+            _hash_memo.move_to_end(key)
+            return cached
+
+    h = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+            h.update(chunk)
+    digest = h.hexdigest()
+    _memo_hash(key, digest)
+    return digest
+
+
+def _memo_hash(key: tuple, digest: str) -> None:
+    with _hash_memo_lock:
+        _hash_memo[key] = digest
+        _hash_memo.move_to_end(key)
+        while len(_hash_memo) > HASH_MEMO_SIZE:
+            _hash_memo.popitem(last=False)
+
+
+def remember_hash(file_path: str, digest: str) -> None:
+    """Record a hash computed elsewhere (e.g. during upload) so file_sha256 needn't re-read the file."""
+    st = os.stat(file_path)
+    _memo_hash((os.path.abspath(file_path), st.st_size, st.st_mtime_ns), digest)
+
+
+# ---------------- Blob store ----------------
+def blob_path(content_hash: str, filename: str = "") -> str:
+    """Path of the blob for a content hash; the original extension is kept for format detection."""
+    ext = os.path.splitext(filename)[1].lower()
+    return os.path.join(BLOB_DIR, content_hash[:2], f"{content_hash}{ext}")
+
+
+def _blob_lock_path(content_hash: str) -> str:
+    return os.path.join(BLOB_LOCK_DIR, f"{content_hash[:2]}.lock")
+
+
+@contextmanager
+def blob_lock(content_hash: str):
+    """
+    Exclusive lock (across threads and worker processes) for one content hash. Uploads hold it
+    from put_blob until their Document row is committed, deletes while they count references
+    and unlink, so a delete can never remove a blob that a new document is about to use.
+    """
+    with open(_blob_lock_path(content_hash), "a") as f:
+        lock_file(f)
+        try:
+            yield
+        finally:
+            unlock_file(f)
+
+
+@asynccontextmanager
+async def ablob_lock(content_hash: str):
+    """blob_lock() for async endpoints: the wait for the lock happens in the threadpool."""
+    with open(_blob_lock_path(content_hash), "a") as f:
+        # closing the file releases the lock, also if we are cancelled while waiting
+        await run_in_threadpool(lock_file, f)
+        try:
+            yield
+        finally:
+            unlock_file(f)
+
+
+def put_blob(src_path: str, content_hash: str, filename: str = "") -> str:
+    """
+    Move a fully written file into the blob store and return the blob path. If the blob
+    already exists the rename just replaces it with identical bytes. Call it under
+    blob_lock(content_hash) when a document will reference the blob.
+    """
+    dest = blob_path(content_hash, filename)
+    os.makedirs(os.path.dirname(dest), exist_ok=True)
+    os.replace(src_path, dest)
+    remember_hash(dest, content_hash)
+    return dest
+
+
+def release_blob(file_path: str, remaining_refs: int) -> None:
+    """Unlink a stored file once no document references it any more (ignore errors)."""
+    if remaining_refs > 0 or not file_path or not os.path.exists(file_path):
+        return
+    try:
+        os.remove(file_path)
+    except Exception:
+        pass
+
+
+# ---------------- Uploads ----------------
+async def save_upload(upload: UploadFile) -> tuple[str, str, int]:
+    """
+    Stream an upload to a temp file in the blob store in chunks through an async file writer,
+    computing its SHA-256 on the fly; failures never leave half-written files behind.
+    Returns (temp_path, sha256, size); raises 413 once MAX_UPLOAD_BYTES is exceeded.
+    The caller publishes the temp file with put_blob() under blob_lock() and discards it
+    with discard_upload() on failure.
+    """
+    if upload.size is not None and upload.size > MAX_UPLOAD_BYTES:
+        raise HTTPException(status_code=413, detail=f"File too large (max {MAX_UPLOAD_BYTES} bytes)")
+
+    tmp_path = os.path.join(BLOB_DIR, f".{uuid.uuid4().hex}.part")
+    h = hashlib.sha256()
+    size = 0
+    try:
+        async with aiofiles.open(tmp_path, "wb") as out:
+            while chunk := await upload.read(UPLOAD_CHUNK_SIZE):
+                size += len(chunk)
+                if size > MAX_UPLOAD_BYTES:
+                    raise HTTPException(status_code=413, detail=f"File too large (max {MAX_UPLOAD_BYTES} bytes)")
+                h.update(chunk)
+                await out.write(chunk)
+    except BaseException:
+        discard_upload(tmp_path)
+        raise
+
+    return tmp_path, h.hexdigest(), size
+
+
+def discard_upload(tmp_path: str) -> None:
+    """Remove an upload's temp file if put_blob() has not moved it into the store."""
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+
+
+# ---------------- Extraction ----------------
+def _extract(file_path: str, max_chars: Optional[int] = None) -> tuple[str, Optional[str]]:
+    """(text, cut reason or None); stopping at max_chars is not a cut, the caller asked for a prefix."""
+    parts, size = [], 0
+    stream = iter_document_text(file_path)
+    while True:
+        try:
+            part = next(stream)
+        except StopIteration as stop:
+            return "\n".join(parts), stop.value
+        parts.append(part)
+        size += len(part) + 1
+        if max_chars is not None and size >= max_chars:
+            stream.close()
+            return "\n".join(parts)[:max_chars], None
+
+
+def extract_text_from_file(file_path: str, max_chars: Optional[int] = None) -> str:
+    """
+    Extract a file's text via the extractor registry (PDF, DOCX, XLSX, PPTX, plain text).
+    With max_chars, extraction stops as soon as that much text has been produced.
+    Raises HTTPException with instructive message on failure.
+    """
+    return _extract(file_path, max_chars)[0]
+
+
+# ---------------- Text cache ----------------
+def _text_cache_path(content_hash: str, page_capped: bool = False) -> str:
+    suffix = f"_p{PDF_MAX_PAGES}" if page_capped else ""
+    return os.path.join(TEXT_CACHE_DIR, f"{content_hash}_v{EXTRACTOR_VERSION}{suffix}.txt")
+
+
+def read_cached_text(content_hash: str) -> Optional[str]:
+    """Return cached extracted text for a content hash, or None on a miss."""
+    for page_capped in (False, True):
+        try:
+            with open(_text_cache_path(content_hash, page_capped), "r", encoding="utf-8") as f:
+                return f.read()
+        except FileNotFoundError:
+            continue
+    return None
+
+
+def write_cached_text(content_hash: str, text: str, page_capped: bool = False) -> None:
+    """Store extracted text atomically (temp file + rename) so readers never see partial writes."""
+    path = _text_cache_path(content_hash, page_capped)
+    tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(tmp_path, path)
+
+
+def get_document_text(file_path: str) -> str:
+    """
+    Return the extracted text of a stored file, extracting it only once per content hash.
+    Every summarize/search call should go through here instead of extract_text_from_file.
+    """
+    content_hash = file_sha256(file_path)
+    text = read_cached_text(content_hash)
+    if text is not None:
+        return text
+
+    text, cut = _extract(file_path)
+    if cut is None or cut == CUT_PAGES:
+        write_cached_text(content_hash, text, page_capped=cut == CUT_PAGES)
+    return text
+
+
+async def aget_document_text(file_path: str) -> str:
+    """get_document_text() run on the extraction pool, for use from async endpoints."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_extract_pool, get_document_text, file_path)
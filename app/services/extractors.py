@@ -0,0 +1,243 @@
+# app/services/extractors.py
+import os
+import time
+import codecs
+import zipfile
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeout
+from typing import Callable, Iterator, Optional
+
+from fastapi import HTTPException
+
+# Text extractors keyed on the MIME type sniffed from the file's content (not its name).
+# Each one is a generator yielding the text of one page / sheet block / slide at a time,
+# so callers can stream the text or stop early. An extractor that cuts a document short
+# returns why (CUT_PAGES / CUT_TIME) as the generator's return value.
+Extractor = Callable[[str], Iterator[str]]
+EXTRACTORS: dict[str, Extractor] = {}
+
+PDF = "application/pdf"
+DOCX = "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+XLSX = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+PPTX = "application/vnd.openxmlformats-officedocument.presentationml.presentation"
+TEXT = "text/plain"
+
+# Friendly names for error messages
+FORMAT_NAMES = {PDF: "PDF", DOCX: "DOCX", XLSX: "XLSX", PPTX: "PPTX", TEXT: "text"}
+
+SNIFF_BYTES = 8192
+TEXT_BLOCK_CHARS = 1024 * 1024
+XLSX_ROWS_PER_BLOCK = 1000
+
+# Long PDFs are split into page ranges extracted in parallel worker processes and
+# reassembled in page order. Extraction stops at PDF_MAX_PAGES pages or after
+# PDF_TIME_BUDGET seconds; the text extracted so far is returned.
+CUT_PAGES = "page limit"
+CUT_TIME = "time budget"
+PDF_WORKERS = int(os.getenv("PDF_WORKERS", str(min(4, os.cpu_count() or 1))))
+PDF_SHARD_PAGES = int(os.getenv("PDF_SHARD_PAGES", "25"))
+PDF_PARALLEL_MIN_PAGES = int(os.getenv("PDF_PARALLEL_MIN_PAGES", "40"))
+PDF_MAX_PAGES = int(os.getenv("PDF_MAX_PAGES", "2000"))
+PDF_TIME_BUDGET = float(os.getenv("PDF_TIME_BUDGET", "300"))
+
+_pdf_pool: Optional[ProcessPoolExecutor] = None
+
+# OOXML packages are zip files; the top-level part folder tells the formats apart
+_OOXML_PARTS = {"word/": DOCX, "xl/": XLSX, "ppt/": PPTX}
+
+
+def register(mime: str):
+    def decorator(fn: Extractor) -> Extractor:
+        EXTRACTORS[mime] = fn
+        return fn
+    return decorator
+
+
+# ---------------- Sniffing ----------------
+def sniff_mime(file_path: str) -> str:
+    with open(file_path, "rb") as f:
+        head = f.read(SNIFF_BYTES)
+
+    if head.startswith(b"%PDF-"):
+        return PDF
+    if head.startswith(b"PK\x03\x04"):
+        try:
+            with zipfile.ZipFile(file_path) as archive:
+                names = archive.namelist()
+        except zipfile.BadZipFile:
+            return "application/octet-stream"
+        for prefix, mime in _OOXML_PARTS.items():
+            if any(name.startswith(prefix) for name in names):
+                return mime
+        return "application/zip"
+    if b"\x00" not in head:
+        try:
+            # incremental decode: a multi-byte character cut at SNIFF_BYTES is not an error
+            codecs.getincrementaldecoder("utf-8")().decode(head, final=False)
+            return TEXT
+        except UnicodeDecodeError:
+            pass
+    return "application/octet-stream"
+
+
+def _missing(package: str, fmt: str) -> HTTPException:
+    return HTTPException(status_code=400, detail=f"To extract {fmt} text install {package}: pip install {package}")
+
+
+# ---------------- Extractors ----------------
+@register(TEXT)
+def extract_text(file_path: str) -> Iterator[str]:
+    with open(file_path, "r", encoding="utf-8") as f:
+        while block := f.read(TEXT_BLOCK_CHARS):
+            yield block
+
+
+def _pdf_reader(file_path: str):
+    try:
+        from PyPDF2 import PdfReader
+    except ImportError:
+        raise _missing("PyPDF2", "PDF")
+    return PdfReader(file_path)
+
+
+def _extract_pdf_pages(file_path: str, start: int, end: int) -> list[str]:
+    """Text of pages [start, end); runs in a worker process, so it reopens the file."""
+    reader = _pdf_reader(file_path)
+    return [reader.pages[i].extract_text() or "" for i in range(start, end)]
+
+
+def _get_pdf_pool() -> ProcessPoolExecutor:
+    global _pdf_pool
+    if _pdf_pool is None:
+        _pdf_pool = ProcessPoolExecutor(max_workers=PDF_WORKERS)
+    return _pdf_pool
+
+
+def shutdown_pdf_pool() -> None:
+    global _pdf_pool
+    if _pdf_pool is not None:
+        _pdf_pool.shutdown(wait=False, cancel_futures=True)
+        _pdf_pool = None
+
+
+@register(PDF)
+def extract_pdf(file_path: str) -> Iterator[str]:
+    reader = _pdf_reader(file_path)
+    total = len(reader.pages)
+    page_count = min(total, PDF_MAX_PAGES)
+    if page_count < total:
+        print(f"PDF extraction of {file_path} capped at {PDF_MAX_PAGES} of {total} pages")
+    deadline = time.monotonic() + PDF_TIME_BUDGET
+
+    if page_count < PDF_PARALLEL_MIN_PAGES or PDF_WORKERS < 2:
+        for i in range(page_count):
+            if time.monotonic() > deadline:
+                print(f"PDF extraction of {file_path} stopped at page {i}: time budget exceeded")
+                return CUT_TIME
+            yield reader.pages[i].extract_text() or ""
+        return CUT_PAGES if page_count < total else None
+
+    pool = _get_pdf_pool()
+    shards = [
+        pool.submit(_extract_pdf_pages, file_path, start, min(start + PDF_SHARD_PAGES, page_count))
+        for start in range(0, page_count, PDF_SHARD_PAGES)
+    ]
+    try:
+        # results are consumed in page order while later shards keep running
+        for number, shard in enumerate(shards):
+            try:
+                pages = shard.result(timeout=max(0.0, deadline - time.monotonic()))
+            except FutureTimeout:
+                print(f"PDF extraction of {file_path} stopped at page {number * PDF_SHARD_PAGES}: time budget exceeded")
+                return CUT_TIME
+            yield from pages
+    finally:
+        # early stop / budget exceeded: drop shards that have not started yet
+        for shard in shards:
+            shard.cancel()
+    return CUT_PAGES if page_count < total else None
+
+
+@register(DOCX)
+def extract_docx(file_path: str) -> Iterator[str]:
+    try:
+        from docx import Document as DocxDocument
+    except ImportError:
+        raise _missing("python-docx", "DOCX")
+    doc = DocxDocument(file_path)
+    for paragraph in doc.paragraphs:
+        yield paragraph.text
+    for table in doc.tables:
+        for row in table.rows:
+            yield "\t".join(cell.text for cell in row.cells)
+
+
+@register(XLSX)
+def extract_xlsx(file_path: str) -> Iterator[str]:
+    """One block per XLSX_ROWS_PER_BLOCK rows; read_only mode streams rows instead of loading the sheet."""
+    try:
+        from openpyxl import load_workbook
+    except ImportError:
+        raise _missing("openpyxl", "XLSX")
+    workbook = load_workbook(file_path, read_only=True, data_only=True)
+    try:
+        for sheet in workbook.worksheets:
+            lines = [f"Sheet: {sheet.title}"]
+            for row in sheet.iter_rows(values_only=True):
+                cells = ["" if value is None else str(value) for value in row]
+                if any(cells):
+                    lines.append("\t".join(cells).rstrip("\t"))
+                if len(lines) >= XLSX_ROWS_PER_BLOCK:
+                    yield "\n".join(lines)
+                    lines = []
+            if lines:
+                yield "\n".join(lines)
+    finally:
+        workbook.close()
+
+
+@register(PPTX)
+def extract_pptx(file_path: str) -> Iterator[str]:
+    """One block per slide: text frames, tables and speaker notes."""
+    try:
+        from pptx import Presentation
+    except ImportError:
+        raise _missing("python-pptx", "PPTX")
+    presentation = Presentation(file_path)
+    for number, slide in enumerate(presentation.slides, start=1):
+        lines = [f"Slide {number}"]
+        for shape in slide.shapes:
+            if shape.has_text_frame:
+                lines.extend(p.text for p in shape.text_frame.paragraphs if p.text)
+            elif getattr(shape, "has_table", False) and shape.has_table:
+                for row in shape.table.rows:
+                    lines.append("\t".join(cell.text for cell in row.cells))
+        if slide.has_notes_slide and slide.notes_slide.notes_text_frame is not None:
+            notes = slide.notes_slide.notes_text_frame.text
+            if notes:
+                lines.append(f"Notes: {notes}")
+        yield "\n".join(lines)
+
+
+# ---------------- Dispatch ----------------
+def iter_document_text(file_path: str) -> Iterator[str]:
+    """
+    Yield a file's text page by page (sheet block / slide) using the extractor for its sniffed type.
+    Returns the extractor's cut reason (CUT_PAGES / CUT_TIME) if the text is incomplete, else None.
+    Raises HTTPException(400) for unsupported formats, missing libraries or unreadable files.
+    """
+    try:
+        mime = sniff_mime(file_path)
+    except OSError as e:
+        raise HTTPException(status_code=400, detail=f"Failed to read file: {str(e)}")
+
+    extractor = EXTRACTORS.get(mime)
+    if extractor is None:
+        supported = ", ".join(FORMAT_NAMES[m] for m in EXTRACTORS)
+        raise HTTPException(status_code=400, detail=f"Unsupported file format. Supported: {supported}")
+
+    try:
+        return (yield from extractor(file_path))
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"{FORMAT_NAMES[mime]} extraction failed: {str(e)}")
@@ -0,0 +1,183 @@
+# app/services/preview_service.py
+import io
+import os
+import json
+import uuid
+import zipfile
+import textwrap
+from typing import Optional
+
+from fastapi import HTTPException
+
+from app.services.document_service import extract_text_from_file, file_sha256, read_cached_text
+
+# Small first-page previews + text teasers, content-addressed like the text cache and kept
+# under PREVIEW_CACHE_MAX_BYTES (least recently used files are evicted first).
+PREVIEW_DIR = os.getenv("PREVIEW_DIR", "preview_cache")
+PREVIEW_VERSION = "1"
+PREVIEW_CACHE_MAX_BYTES = int(os.getenv("PREVIEW_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+THUMBNAIL_SIZE = (320, 420)
+TEASER_CHARS = 300
+os.makedirs(PREVIEW_DIR, exist_ok=True)
+
+# OOXML files (docx/pptx/xlsx) may carry a thumbnail written by the saving application
+OOXML_EXTENSIONS = {".docx", ".pptx", ".xlsx"}
+OOXML_THUMBNAILS = ("docProps/thumbnail.jpeg", "docProps/thumbnail.jpg", "docProps/thumbnail.png")
+
+
+def _preview_path(content_hash: str, kind: str) -> str:
+    return os.path.join(PREVIEW_DIR, f"{content_hash}_v{PREVIEW_VERSION}.{kind}")
+
+
+# ---------------- Rendering ----------------
+def _pdf_first_page(file_path: str) -> Optional[bytes]:
+    """First page rasterized with PyMuPDF, if it is installed."""
+    try:
+        import fitz  # PyMuPDF
+    except ImportError:
+        return None
+    with fitz.open(file_path) as pdf:
+        if not pdf.page_count:
+            return None
+        page = pdf[0]
+        zoom = min(THUMBNAIL_SIZE[0] / page.rect.width, THUMBNAIL_SIZE[1] / page.rect.height)
+        return page.get_pixmap(matrix=fitz.Matrix(zoom, zoom), alpha=False).tobytes("png")
+
+
+def _ooxml_thumbnail(file_path: str) -> Optional[bytes]:
+    try:
+        with zipfile.ZipFile(file_path) as archive:
+            names = set(archive.namelist())
+            for name in OOXML_THUMBNAILS:
+                if name in names:
+                    return archive.read(name)
+    except zipfile.BadZipFile:
+        return None
+    return None
+
+
+def _text_card(title: str, teaser: str):
+    """Plain page-like image with the title and opening text, for files nothing can render."""
+    from PIL import Image, ImageDraw
+    image = Image.new("RGB", THUMBNAIL_SIZE, "white")
+    draw = ImageDraw.Draw(image)
+    draw.rectangle([0, 0, THUMBNAIL_SIZE[0] - 1, THUMBNAIL_SIZE[1] - 1], outline="#cccccc")
+    y = 12
+    for line in textwrap.wrap(title, 40)[:2]:
+        draw.text((12, y), line, fill="black")
+        y += 16
+    y += 8
+    for line in textwrap.wrap(teaser, 48):
+        if y > THUMBNAIL_SIZE[1] - 20:
+            break
+        draw.text((12, y), line, fill="#555555")
+        y += 14
+    return image
+
+
+def render_thumbnail(file_path: str, filename: str, teaser: str) -> Optional[bytes]:
+    """JPEG thumbnail of the first page; None if Pillow is not installed."""
+    try:
+        from PIL import Image
+    except ImportError:
+        return None
+
+    ext = os.path.splitext(filename or file_path)[1].lower()
+    source = None
+    try:
+        if ext == ".pdf":
+            source = _pdf_first_page(file_path)
+        elif ext in OOXML_EXTENSIONS:
+            source = _ooxml_thumbnail(file_path)
+        image = Image.open(io.BytesIO(source)).convert("RGB") if source else None
+    except Exception:
+        image = None   # unreadable embedded image / PDF: fall back to the text card
+    if image is None:
+        image = _text_card(filename or os.path.basename(file_path), teaser)
+
+    image.thumbnail(THUMBNAIL_SIZE)
+    out = io.BytesIO()
+    image.save(out, "JPEG", quality=75, optimize=True)
+    return out.getvalue()
+
+
+def make_teaser(file_path: str) -> str:
+    """Opening text of a file; on a text-cache miss only that prefix is extracted."""
+    try:
+        text = read_cached_text(file_sha256(file_path))
+        if text is None:
+            text = extract_text_from_file(file_path, max_chars=TEASER_CHARS * 2)
+    except HTTPException:
+        return ""
+    text = " ".join(text[:TEASER_CHARS * 2].split())
+    if len(text) <= TEASER_CHARS:
+        return text
+    return text[:TEASER_CHARS].rsplit(" ", 1)[0] + "…"
+
+
+# ---------------- Cache ----------------
+def _write_atomic(path: str, data: bytes) -> None:
+    tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+def _touch(path: str) -> None:
+    try:
+        os.utime(path)
+    except FileNotFoundError:
+        pass
+
+
+def _evict_previews() -> None:
+    """Delete least recently used preview files until the cache fits PREVIEW_CACHE_MAX_BYTES."""
+    entries = []
+    with os.scandir(PREVIEW_DIR) as it:
+        for entry in it:
+            if entry.is_file() and not entry.name.endswith(".tmp"):
+                st = entry.stat()
+                entries.append((st.st_mtime, st.st_size, entry.path))
+    total = sum(size for _, size, _ in entries)
+    for _, size, path in sorted(entries):
+        if total <= PREVIEW_CACHE_MAX_BYTES:
+            break
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        total -= size
+
+
+def generate_preview(file_path: str, filename: str, content_hash: str) -> dict:
+    """Build (or reuse) the teaser + thumbnail for a blob. Runs as an upload background task."""
+    teaser_path = _preview_path(content_hash, "json")
+    thumb_path = _preview_path(content_hash, "jpg")
+    try:
+        with open(teaser_path, "r", encoding="utf-8") as f:
+            cached = json.load(f)
+        if not cached["has_thumbnail"] or os.path.exists(thumb_path):
+            _touch(teaser_path)
+            _touch(thumb_path)
+            return cached
+    except FileNotFoundError:
+        pass
+
+    teaser = make_teaser(file_path)
+    thumbnail = render_thumbnail(file_path, filename, teaser)
+    preview = {"teaser": teaser, "has_thumbnail": thumbnail is not None}
+    if thumbnail is not None:
+        _write_atomic(thumb_path, thumbnail)
+    _write_atomic(teaser_path, json.dumps(preview).encode("utf-8"))
+    _evict_previews()
+    return preview
+
+
+def get_thumbnail_path(file_path: str, filename: str, content_hash: str) -> Optional[str]:
+    path = _preview_path(content_hash, "jpg")
+    if os.path.exists(path):
+        _touch(path)
+        return path
+    if generate_preview(file_path, filename, content_hash)["has_thumbnail"]:
+        return path
+    return None
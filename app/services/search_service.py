@@ -0,0 +1,147 @@
+# app/services/search_service.py
+import os
+import re
+import html
+from typing import Optional
+
+from fastapi import HTTPException
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from app.database import SessionLocal
+from app.models.document import Document
+from app.models.document_text import DocumentText
+from app.services.document_service import get_document_text
+from app.services.visibility_service import visible_documents_filter
+
+# Postgres caps a tsvector at 1 MB, so only the first SEARCH_MAX_CHARS characters are indexed
+SEARCH_MAX_CHARS = int(os.getenv("SEARCH_MAX_CHARS", "500000"))
+SEARCH_LANGUAGE = "english"
+# Snippets are HTML: the document text is escaped and only our own <mark> tags are live.
+# ts_headline marks matches with control characters (stripped from indexed content), which
+# become <mark> tags after escaping.
+MARK_START, MARK_STOP = "\x02", "\x03"
+HEADLINE_OPTIONS = f"StartSel={MARK_START}, StopSel={MARK_STOP}, MaxWords=30, MinWords=10, MaxFragments=2"
+
+
+# ---------------- Indexing ----------------
+def index_document_text(doc_id: int) -> None:
+    """
+    Extract (or load cached) text for a document and (re)build its search row.
+    Runs as an upload background task; extraction failures just leave the document unindexed.
+    """
+    db = SessionLocal()
+    try:
+        doc = db.query(Document).filter(Document.id == doc_id).first()
+        if not doc or not doc.file_path or not os.path.exists(doc.file_path):
+            return
+        try:
+            text = get_document_text(doc.file_path)[:SEARCH_MAX_CHARS]
+        except HTTPException:
+            return
+        text = text.replace(MARK_START, "").replace(MARK_STOP, "")
+
+        # title and filename are searchable too
+        indexed = " ".join(filter(None, [doc.title, doc.filename, text]))
+        vector = func.to_tsvector(SEARCH_LANGUAGE, indexed) if _is_postgres(db) else indexed
+
+        row = db.get(DocumentText, doc_id)
+        if row:
+            row.content = text
+            row.search_vector = vector
+        else:
+            db.add(DocumentText(doc_id=doc_id, content=text, search_vector=vector))
+        db.commit()
+    finally:
+        db.close()
+
+
+def _is_postgres(db: Session) -> bool:
+    return db.get_bind().dialect.name == "postgresql"
+
+
+# ---------------- Querying ----------------
+def search_documents(db: Session, q: str, role: Optional[str], limit: int = 20) -> list[dict]:
+    """
+    Ranked full-text search over document contents. Pass role=None for senior users;
+    otherwise role-based visibility is applied inside the query.
+    """
+    if not _is_postgres(db):
+        return _search_documents_fallback(db, q, role, limit)
+
+    tsquery = func.websearch_to_tsquery(SEARCH_LANGUAGE, q)
+    rank = func.ts_rank_cd(DocumentText.search_vector, tsquery)
+
+    # rank + limit first, then build headlines only for the page of hits
+    hits = (
+        select(DocumentText.doc_id, rank.label("rank"))
+        .join(Document, Document.id == DocumentText.doc_id)
+        .where(DocumentText.search_vector.op("@@")(tsquery))
+    )
+    if role is not None:
+        hits = hits.where(visible_documents_filter(role))
+    hits = hits.order_by(rank.desc()).limit(limit).subquery()
+
+    snippet = func.ts_headline(SEARCH_LANGUAGE, DocumentText.content, tsquery, HEADLINE_OPTIONS)
+    rows = db.execute(
+        select(Document, hits.c.rank, snippet.label("snippet"))
+        .join(hits, hits.c.doc_id == Document.id)
+        .join(DocumentText, DocumentText.doc_id == Document.id)
+        .order_by(hits.c.rank.desc())
+    ).all()
+    return [_search_result(doc, rank, _marked_html(snippet)) for doc, rank, snippet in rows]
+
+
+def _marked_html(headline: str) -> str:
+    """Escape a ts_headline result, then turn its match markers into <mark> tags."""
+    return html.escape(headline or "").replace(MARK_START, "<mark>").replace(MARK_STOP, "</mark>")
+
+
+def _search_documents_fallback(db: Session, q: str, role: Optional[str], limit: int) -> list[dict]:
+    """Substring search for databases without tsvector (e.g. SQLite in tests); ranked by match count."""
+    terms = [t for t in re.findall(r"\w+", q.lower()) if t]
+    if not terms:
+        return []
+    query = (
+        db.query(Document, DocumentText.content)
+        .join(DocumentText, DocumentText.doc_id == Document.id)
+        .filter(*[func.lower(DocumentText.content).contains(t) for t in terms])
+    )
+    if role is not None:
+        query = query.filter(visible_documents_filter(role))
+
+    results = []
+    for doc, content in query.all():
+        lowered = content.lower()
+        rank = sum(lowered.count(t) for t in terms)
+        results.append(_search_result(doc, rank, _highlight(content, terms)))
+    results.sort(key=lambda r: r["rank"], reverse=True)
+    return results[:limit]
+
+
+def _highlight(content: str, terms: list[str], width: int = 200) -> str:
+    lowered = content.lower()
+    start = min((lowered.find(t) for t in terms if t in lowered), default=0)
+    fragment = content[max(0, start - width // 4): start + width]
+    pattern = re.compile("|".join(re.escape(t) for t in terms), re.IGNORECASE)
+    # escape the text around and inside each match; only the <mark> tags are markup
+    parts, last = [], 0
+    for m in pattern.finditer(fragment):
+        parts.append(html.escape(fragment[last:m.start()]))
+        parts.append(f"<mark>{html.escape(m.group(0))}</mark>")
+        last = m.end()
+    parts.append(html.escape(fragment[last:]))
+    return "".join(parts)
+
+
+def _search_result(doc: Document, rank, snippet: str) -> dict:
+    return {
+        "id": doc.id,
+        "title": doc.title,
+        "filename": doc.filename,
+        "department": doc.department or "General",
+        "access_role": doc.access_role or "Restricted",
+        "uploaded_at": doc.uploaded_at.isoformat() if doc.uploaded_at else None,
+        "rank": float(rank or 0),
+        "snippet": snippet,
+    }
@@ -0,0 +1,256 @@
+# app/services/semantic_search.py
+import os
+import json
+import threading
+from contextlib import contextmanager
+from typing import NamedTuple, Optional
+
+import numpy as np
+from fastapi import HTTPException
+
+from app.core.file_lock import lock_file, unlock_file
+from app.database import SessionLocal
+from app.models.document import Document
+from app.services.ai_helpers import chunk_text
+from app.services.document_service import get_document_text
+
+# Small local sentence-embedding model, loaded on first use (transformers on CPU, like mychatbot)
+EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "sentence-transformers/all-MiniLM-L6-v2")
+EMBEDDING_DIM = int(os.getenv("EMBEDDING_DIM", "384"))
+EMBED_CHUNK_CHARS = int(os.getenv("EMBED_CHUNK_CHARS", "1000"))
+EMBED_BATCH_SIZE = int(os.getenv("EMBED_BATCH_SIZE", "32"))
+VECTOR_DIR = os.getenv("VECTOR_DIR", "vector_index")
+
+_tokenizer = None
+_model = None
+_model_lock = threading.Lock()
+
+
+# ---------------- Embedding model ----------------
+def _load_model():
+    global _tokenizer, _model
+    with _model_lock:
+        if _model is None:
+            try:
+                import torch  # noqa: F401
+                from transformers import AutoTokenizer, AutoModel
+            except Exception:
+                raise HTTPException(status_code=503, detail="Semantic search needs transformers + torch: pip install transformers torch")
+            _tokenizer = AutoTokenizer.from_pretrained(EMBEDDING_MODEL)
+            _model = AutoModel.from_pretrained(EMBEDDING_MODEL).eval()
+    return _tokenizer, _model
+
+
+def embed_texts(texts: list[str]) -> np.ndarray:
+    """Embed texts in batches; returns an L2-normalized float32 matrix (len(texts) x EMBEDDING_DIM)."""
+    tokenizer, model = _load_model()
+    import torch
+    out = []
+    with torch.inference_mode():
+        for i in range(0, len(texts), EMBED_BATCH_SIZE):
+            batch = tokenizer(texts[i:i + EMBED_BATCH_SIZE], padding=True, truncation=True, return_tensors="pt")
+            hidden = model(**batch).last_hidden_state
+            # mean pooling over real (non-padding) tokens
+            mask = batch["attention_mask"].unsqueeze(-1).to(hidden.dtype)
+            pooled = (hidden * mask).sum(dim=1) / mask.sum(dim=1).clamp(min=1e-9)
+            pooled = torch.nn.functional.normalize(pooled, p=2, dim=1)
+            out.append(pooled.cpu().numpy().astype(np.float32))
+    if not out:
+        return np.zeros((0, EMBEDDING_DIM), dtype=np.float32)
+    return np.vstack(out)
+
+
+# ---------------- Vector index ----------------
+class _Snapshot(NamedTuple):
+    vectors: np.ndarray
+    doc_ids: np.ndarray
+    offsets: np.ndarray
+    alive: np.ndarray
+
+
+class VectorIndex:
+    """
+    Append-only on-disk vector store:
+      vectors.f32  row-major float32 matrix, memory-mapped for search
+      doc_ids.i32  document id per row
+      offsets.i64  byte offset of each row's chunk in chunks.jsonl
+      deleted.i32  tombstoned rows (deleted or re-indexed documents)
+    Rows become visible once their vector is written, which happens last. Writers hold an
+    exclusive file lock on index.lock, so several worker processes can share one directory.
+    Searches run against an immutable snapshot; writers swap in a new one.
+    """
+
+    def __init__(self, directory: str, dim: int):
+        self.directory = directory
+        self.dim = dim
+        self._lock = threading.RLock()
+        os.makedirs(directory, exist_ok=True)
+        self._load()
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.directory, name)
+
+    def _size(self, name: str) -> int:
+        try:
+            return os.path.getsize(self._path(name))
+        except FileNotFoundError:
+            return 0
+
+    def _read(self, name: str, dtype, count: int = -1) -> np.ndarray:
+        if not self._size(name):
+            return np.zeros(0, dtype=dtype)
+        return np.fromfile(self._path(name), dtype=dtype, count=count)
+
+    def _rows(self) -> int:
+        """Rows complete in every file (a crashed writer can leave one file ahead of the others)."""
+        return min(
+            self._size("vectors.f32") // (4 * self.dim),
+            self._size("doc_ids.i32") // 4,
+            self._size("offsets.i64") // 8,
+        )
+
+    def _load(self) -> None:
+        n = self._rows()
+        if n:
+            vectors = np.memmap(self._path("vectors.f32"), dtype=np.float32, mode="r", shape=(n, self.dim))
+        else:
+            vectors = np.zeros((0, self.dim), dtype=np.float32)
+        alive = np.ones(n, dtype=bool)
+        deleted = self._read("deleted.i32", np.int32, self._size("deleted.i32") // 4)
+        alive[deleted[deleted < n]] = False
+        self._snapshot = _Snapshot(vectors, self._read("doc_ids.i32", np.int32, n), self._read("offsets.i64", np.int64, n), alive)
+        self._stamp = (self._size("vectors.f32"), self._size("deleted.i32"))
+
+    def _refresh(self) -> None:
+        """Pick up rows written by another worker process."""
+        if (self._size("vectors.f32"), self._size("deleted.i32")) != self._stamp:
+            self._load()
+
+    @contextmanager
+    def _writing(self):
+        """Exclusive write access across threads (RLock) and worker processes (file lock)."""
+        with self._lock, open(self._path("index.lock"), "a") as lock_handle:
+            lock_file(lock_handle)
+            try:
+                self._load()
+                yield
+            finally:
+                unlock_file(lock_handle)
+
+    def _repair(self) -> None:
+        """Cut every file back to the last row that was completely written (caller holds the write lock)."""
+        n = len(self._snapshot.doc_ids)
+        for name, itemsize in (("vectors.f32", 4 * self.dim), ("doc_ids.i32", 4), ("offsets.i64", 8)):
+            if self._size(name) != n * itemsize:
+                os.truncate(self._path(name), n * itemsize)
+        if self._size("deleted.i32") % 4:
+            os.truncate(self._path("deleted.i32"), self._size("deleted.i32") // 4 * 4)
+
+    def add(self, doc_id: int, vectors: np.ndarray, texts: list[str]) -> None:
+        """Replace the rows of doc_id with new chunk vectors."""
+        with self._writing():
+            self._repair()
+            self._tombstone(doc_id)
+            offsets = []
+            with open(self._path("chunks.jsonl"), "ab") as f:
+                for text in texts:
+                    offsets.append(f.tell())
+                    f.write(json.dumps({"doc_id": doc_id, "text": text}).encode("utf-8") + b"\n")
+            with open(self._path("offsets.i64"), "ab") as f:
+                np.asarray(offsets, dtype=np.int64).tofile(f)
+            with open(self._path("doc_ids.i32"), "ab") as f:
+                np.full(len(texts), doc_id, dtype=np.int32).tofile(f)
+            with open(self._path("vectors.f32"), "ab") as f:
+                np.ascontiguousarray(vectors, dtype=np.float32).tofile(f)
+            self._load()
+
+    def remove(self, doc_id: int) -> None:
+        with self._writing():
+            self._tombstone(doc_id)
+
+    def _tombstone(self, doc_id: int) -> None:
+        snapshot = self._snapshot
+        rows = np.nonzero((snapshot.doc_ids == doc_id) & snapshot.alive)[0].astype(np.int32)
+        if not len(rows):
+            return
+        with open(self._path("deleted.i32"), "ab") as f:
+            rows.tofile(f)
+        alive = snapshot.alive.copy()
+        alive[rows] = False
+        self._snapshot = snapshot._replace(alive=alive)
+        self._stamp = (self._size("vectors.f32"), self._size("deleted.i32"))
+
+    def search(self, query: np.ndarray, k: int, allowed_doc_ids: Optional[np.ndarray] = None) -> list[tuple[int, float]]:
+        """Top-k (row, cosine score) for a normalized query vector, restricted to allowed documents."""
+        with self._lock:
+            self._refresh()
+            snapshot = self._snapshot
+        if not len(snapshot.vectors):
+            return []
+        scores = snapshot.vectors @ query.astype(np.float32)
+        mask = snapshot.alive
+        if allowed_doc_ids is not None:
+            mask = mask & np.isin(snapshot.doc_ids, allowed_doc_ids)
+        scores = np.where(mask, scores, -np.inf)
+
+        k = min(k, int(mask.sum()))
+        if k <= 0:
+            return []
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(int(row), float(scores[row])) for row in top]
+
+    def chunk(self, row: int) -> dict:
+        with open(self._path("chunks.jsonl"), "rb") as f:
+            f.seek(int(self._snapshot.offsets[row]))
+            return json.loads(f.readline())
+
+
+_index: Optional[VectorIndex] = None
+
+
+def get_index() -> VectorIndex:
+    global _index
+    if _index is None:
+        _index = VectorIndex(VECTOR_DIR, EMBEDDING_DIM)
+    return _index
+
+
+# ---------------- Indexing ----------------
+def index_document_embeddings(doc_id: int) -> None:
+    """Chunk + embed a document's text into the vector index (upload background task)."""
+    db = SessionLocal()
+    try:
+        doc = db.query(Document).filter(Document.id == doc_id).first()
+        if not doc or not doc.file_path or not os.path.exists(doc.file_path):
+            return
+        file_path = doc.file_path
+    finally:
+        db.close()
+
+    try:
+        chunks = chunk_text(get_document_text(file_path), EMBED_CHUNK_CHARS)
+        if chunks:
+            get_index().add(doc_id, embed_texts(chunks), chunks)
+    except HTTPException as e:
+        # unsupported format or embedding model unavailable: document stays keyword-searchable only
+        print(f"Semantic indexing skipped for document {doc_id}: {e.detail}")
+    except Exception as e:
+        # never raise out of a background task: Starlette would skip the upload's remaining tasks
+        print(f"Semantic indexing failed for document {doc_id}: {e}")
+
+
+def remove_document_embeddings(doc_id: int) -> None:
+    get_index().remove(doc_id)
+
+
+# ---------------- Querying ----------------
+def semantic_search(q: str, k: int, allowed_doc_ids: Optional[np.ndarray]) -> list[dict]:
+    """Top-k chunks most similar to q; allowed_doc_ids=None means no access restriction."""
+    index = get_index()
+    query = embed_texts([q])[0]
+    results = []
+    for row, score in index.search(query, k, allowed_doc_ids):
+        chunk = index.chunk(row)
+        results.append({"doc_id": chunk["doc_id"], "score": round(score, 4), "text": chunk["text"]})
+    return results
@@ -0,0 +1,286 @@
+# app/services/summary_jobs.py
+# In-process background queue for summarization: jobs are accepted immediately and run
+# by a small pool of asyncio workers (no external broker). Concurrent requests for the
+# same document share one in-flight job; callers poll it or stream progress over SSE.
+import os
+import json
+import time
+import uuid
+import asyncio
+from typing import Optional
+
+from fastapi import HTTPException
+from starlette.concurrency import run_in_threadpool
+
+from app.database import SessionLocal
+from app.services.document_service import aget_document_text, file_sha256
+from app.services.ai_helpers import (
+    HF_MODEL, HF_CACHE_PARAMS, OPENAI_MODEL, OPENAI_CACHE_PARAMS,
+    get_cached_summary, store_summary, summary_backends,
+    summarize_with_hf, summarize_with_openai, stream_with_openai, mock_summary,
+)
+
+SUMMARY_WORKERS = int(os.getenv("SUMMARY_WORKERS", "4"))
+SUMMARY_QUEUE_SIZE = int(os.getenv("SUMMARY_QUEUE_SIZE", "100"))
+JOB_RETENTION_SECONDS = int(os.getenv("SUMMARY_JOB_RETENTION_SECONDS", "600"))
+SSE_KEEPALIVE_SECONDS = 15
+
+FINISHED_STATES = {"done", "failed"}
+
+
+class SummaryJob:
+    def __init__(self, doc_id: int):
+        self.id = uuid.uuid4().hex
+        self.doc_id = doc_id
+        self.status = "queued"          # queued -> extracting -> summarizing -> done | failed
+        self.progress = 0.0
+        self.result: Optional[dict] = None
+        self.error: Optional[str] = None
+        self.status_code: Optional[int] = None
+        self.created_at = time.time()
+        self.updated_at = self.created_at
+        self._changed = asyncio.Event()
+
+    @property
+    def finished(self) -> bool:
+        return self.status in FINISHED_STATES
+
+    def update(self, **changes) -> None:
+        """Apply changes and wake every waiter/subscriber."""
+        for key, value in changes.items():
+            setattr(self, key, value)
+        self.updated_at = time.time()
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    async def wait(self) -> None:
+        while not self.finished:
+            await self._changed.wait()
+
+    def to_dict(self) -> dict:
+        return {
+            "job_id": self.id,
+            "doc_id": self.doc_id,
+            "status": self.status,
+            "progress": round(self.progress, 3),
+            "result": self.result,
+            "error": self.error,
+            "created_at": self.created_at,
+            "updated_at": self.updated_at,
+        }
+
+
+_jobs: dict[str, SummaryJob] = {}
+_inflight: dict[int, SummaryJob] = {}   # doc_id -> unfinished job, for deduplication
+_queue: Optional[asyncio.Queue] = None
+_workers: list[asyncio.Task] = []
+
+
+# ---------------- Pipeline ----------------
+def lookup_document(doc_id: int):
+    """
+    Blocking part of the pipeline (run in the threadpool): resolve the stored file,
+    hash it and return (file_path, file_hash, cached_response_or_None).
+    """
+    from app.models.document import Document
+    db = SessionLocal()
+    try:
+        doc = db.query(Document).filter(Document.id == doc_id).first()
+        if not doc:
+            raise HTTPException(status_code=404, detail="Document not found")
+
+        file_path = getattr(doc, "file_path", None)
+        if not file_path or not os.path.exists(file_path):
+            raise HTTPException(status_code=404, detail="File not found on server")
+
+        # Serve a cached summary if one exists for this exact file content (backends in preference order)
+        file_hash = doc.content_hash or file_sha256(file_path)
+        for backend, model, params in summary_backends():
+            cached = get_cached_summary(db, doc_id, file_hash, backend, model, params)
+            if cached:
+                return file_path, file_hash, {"summary": cached, "source": backend, "model": model, "cached": True}
+        return file_path, file_hash, None
+    finally:
+        db.close()
+
+
+def save_summary(doc_id: int, file_hash: str, backend: str, model: str, params: dict, summary: str):
+    db = SessionLocal()
+    try:
+        store_summary(db, doc_id, file_hash, backend, model, params, summary)
+    finally:
+        db.close()
+
+
+async def run_summary(job: SummaryJob) -> dict:
+    """Extract + summarize one document, reporting progress on the job."""
+    doc_id = job.doc_id
+    # DB work and hashing are blocking, keep them off the event loop
+    file_path, file_hash, cached = await run_in_threadpool(lookup_document, doc_id)
+    if cached:
+        return cached
+
+    # Extract text once per file content (supports .txt, .pdf, .docx if libs installed)
+    job.update(status="extracting", progress=0.05)
+    text = await aget_document_text(file_path)
+    if not text or not text.strip():
+        raise HTTPException(status_code=400, detail="Document contains no extractable text")
+
+    job.update(status="summarizing", progress=0.1)
+
+    def on_progress(done: int, total: int) -> None:
+        job.update(progress=0.1 + 0.85 * done / total)
+
+    # Try Hugging Face first (recommended for quick free-tier integration)
+    hf_summary = await summarize_with_hf(text, on_progress)
+    if hf_summary:
+        await run_in_threadpool(save_summary, doc_id, file_hash, "huggingface", HF_MODEL, HF_CACHE_PARAMS, hf_summary)
+        return {"summary": hf_summary, "source": "huggingface", "model": HF_MODEL, "cached": False}
+
+    # Then try OpenAI if configured
+    openai_summary = await summarize_with_openai(text, on_progress)
+    if openai_summary:
+        await run_in_threadpool(save_summary, doc_id, file_hash, "openai", OPENAI_MODEL, OPENAI_CACHE_PARAMS, openai_summary)
+        return {"summary": openai_summary, "source": "openai", "model": OPENAI_MODEL, "cached": False}
+
+    # Fallback to a simple local summarizer (cheap, so never cached)
+    fallback = mock_summary(text)
+    return {"summary": fallback, "source": "fallback", "model": None, "cached": False}
+
+
+def _sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+async def stream_summary(doc_id: int, file_path: str, file_hash: str, cached: Optional[dict]):
+    """
+    Server-sent events for one summary, keeping the HF -> OpenAI -> fallback order.
+    HF answers arrive whole; OpenAI tokens are forwarded as they are generated.
+    Events: meta (provenance), token (text delta), done (full result) or error.
+    """
+    if cached:
+        yield _sse("meta", {k: v for k, v in cached.items() if k != "summary"})
+        yield _sse("token", {"text": cached["summary"]})
+        yield _sse("done", cached)
+        return
+
+    try:
+        text = await aget_document_text(file_path)
+    except HTTPException as e:
+        yield _sse("error", {"detail": e.detail})
+        return
+    if not text or not text.strip():
+        yield _sse("error", {"detail": "Document contains no extractable text"})
+        return
+
+    # Try Hugging Face first (no token streaming there, the summary comes back whole)
+    hf_summary = await summarize_with_hf(text)
+    if hf_summary:
+        await run_in_threadpool(save_summary, doc_id, file_hash, "huggingface", HF_MODEL, HF_CACHE_PARAMS, hf_summary)
+        result = {"summary": hf_summary, "source": "huggingface", "model": HF_MODEL, "cached": False}
+        yield _sse("meta", {"source": "huggingface", "model": HF_MODEL, "cached": False})
+        yield _sse("token", {"text": hf_summary})
+        yield _sse("done", result)
+        return
+
+    # Then stream OpenAI tokens as they arrive
+    parts = []
+    try:
+        async for token in stream_with_openai(text):
+            if not parts:
+                yield _sse("meta", {"source": "openai", "model": OPENAI_MODEL, "cached": False})
+            parts.append(token)
+            yield _sse("token", {"text": token})
+    except Exception as e:
+        if parts:
+            # tokens already went out, too late to switch backends
+            yield _sse("error", {"detail": f"OpenAI stream interrupted: {str(e)}"})
+            return
+    if parts:
+        openai_summary = "".join(parts)
+        await run_in_threadpool(save_summary, doc_id, file_hash, "openai", OPENAI_MODEL, OPENAI_CACHE_PARAMS, openai_summary)
+        yield _sse("done", {"summary": openai_summary, "source": "openai", "model": OPENAI_MODEL, "cached": False})
+        return
+
+    # Fallback to a simple local summarizer (cheap, so never cached)
+    fallback = mock_summary(text)
+    yield _sse("meta", {"source": "fallback", "model": None, "cached": False})
+    yield _sse("token", {"text": fallback})
+    yield _sse("done", {"summary": fallback, "source": "fallback", "model": None, "cached": False})
+
+
+# ---------------- Queue & workers ----------------
+async def _worker() -> None:
+    while True:
+        job = await _queue.get()
+        try:
+            result = await run_summary(job)
+            job.update(status="done", progress=1.0, result=result)
+        except HTTPException as e:
+            job.update(status="failed", error=e.detail, status_code=e.status_code)
+        except Exception as e:
+            job.update(status="failed", error=f"Summarization failed: {str(e)}", status_code=500)
+        finally:
+            if _inflight.get(job.doc_id) is job:
+                del _inflight[job.doc_id]
+            _queue.task_done()
+
+
+def _prune_jobs() -> None:
+    cutoff = time.time() - JOB_RETENTION_SECONDS
+    for job_id in [j.id for j in _jobs.values() if j.finished and j.updated_at < cutoff]:
+        del _jobs[job_id]
+
+
+def start_workers() -> None:
+    global _queue
+    _queue = asyncio.Queue(maxsize=SUMMARY_QUEUE_SIZE)
+    for _ in range(SUMMARY_WORKERS):
+        _workers.append(asyncio.create_task(_worker()))
+
+
+async def stop_workers() -> None:
+    for task in _workers:
+        task.cancel()
+    await asyncio.gather(*_workers, return_exceptions=True)
+    _workers.clear()
+
+
+def submit(doc_id: int) -> SummaryJob:
+    """Queue a summary for doc_id, or return the job already running for it."""
+    existing = _inflight.get(doc_id)
+    if existing and not existing.finished:
+        return existing
+
+    _prune_jobs()
+    job = SummaryJob(doc_id)
+    try:
+        _queue.put_nowait(job)
+    except asyncio.QueueFull:
+        raise HTTPException(status_code=503, detail="Summarization queue is full, try again shortly")
+    _jobs[job.id] = job
+    _inflight[doc_id] = job
+    return job
+
+
+def get_job(job_id: str) -> SummaryJob:
+    job = _jobs.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+
+async def job_events(job: SummaryJob):
+    """Server-sent events stream of job snapshots, ending once the job finishes."""
+    changed = job._changed
+    # a subscriber arriving after the job finished still gets its done event
+    yield _sse("done" if job.finished else "progress", job.to_dict())
+    while not job.finished:
+        try:
+            await asyncio.wait_for(changed.wait(), timeout=SSE_KEEPALIVE_SECONDS)
+        except asyncio.TimeoutError:
+            yield ": keep-alive\n\n"
+            continue
+        changed = job._changed
+        event = "done" if job.finished else "progress"
+        yield _sse(event, job.to_dict())
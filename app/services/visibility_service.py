@@ -0,0 +1,83 @@
+# app/services/visibility_service.py
+from typing import Iterable, Optional
+
+import numpy as np
+from sqlalchemy import exists, insert, literal, or_, select
+from sqlalchemy.orm import Session
+
+from app.models.document import Document
+from app.models.document_access import DocumentAccess
+from app.models.document_visibility import DocumentVisibility
+
+# visibility row for documents shared with every role
+ALL_ROLES = "*"
+ALL_EMPLOYEES = "All Employees"
+
+
+# ---------------- Maintenance ----------------
+def visibility_roles(access_role: Optional[str], roles: Iterable[str]) -> set[str]:
+    """
+    Rows a document needs: "*" if shared with All Employees, else its granted roles. A role
+    literally named "*" matched nobody under the old rules, so it grants nothing here either.
+    """
+    if access_role == ALL_EMPLOYEES:
+        return {ALL_ROLES}
+    return {r for r in roles if r and r != ALL_ROLES}
+
+
+def set_document_visibility(db: Session, doc_id: int, access_role: Optional[str], roles: Iterable[str]) -> None:
+    """(Re)write a document's visibility rows; the caller commits with the document change."""
+    clear_document_visibility(db, doc_id)
+    db.add_all(DocumentVisibility(role=role, doc_id=doc_id) for role in visibility_roles(access_role, roles))
+
+
+def clear_document_visibility(db: Session, doc_id: int) -> None:
+    db.query(DocumentVisibility).filter(DocumentVisibility.doc_id == doc_id).delete(synchronize_session=False)
+
+
+def backfill_document_visibility(db: Session) -> None:
+    """
+    Add any visibility rows missing for documents.access_role + document_access (safe to re-run).
+    Same rules as the c3d91f27a5e4 migration; the caller commits.
+    """
+    def missing(role, doc_id):
+        return ~exists().where(DocumentVisibility.role == role, DocumentVisibility.doc_id == doc_id)
+
+    shared = select(literal(ALL_ROLES), Document.id).where(
+        Document.access_role == ALL_EMPLOYEES, missing(ALL_ROLES, Document.id)
+    )
+    granted = select(DocumentAccess.role, DocumentAccess.doc_id).distinct().join(
+        Document, Document.id == DocumentAccess.doc_id
+    ).where(
+        DocumentAccess.role.isnot(None),
+        DocumentAccess.role != ALL_ROLES,
+        or_(Document.access_role.is_(None), Document.access_role != ALL_EMPLOYEES),
+        missing(DocumentAccess.role, DocumentAccess.doc_id),
+    )
+    db.execute(insert(DocumentVisibility).from_select(["role", "doc_id"], shared))
+    db.execute(insert(DocumentVisibility).from_select(["role", "doc_id"], granted))
+
+
+# ---------------- Checks ----------------
+def _for_role(role: str):
+    return DocumentVisibility.role.in_((role, ALL_ROLES))
+
+
+def visible_documents_filter(role: str):
+    """SQL condition on Document for documents a non-senior role may see."""
+    return exists().where(DocumentVisibility.doc_id == Document.id, _for_role(role))
+
+
+def can_view(db: Session, role: str, doc_id: int) -> bool:
+    """Primary-key probe: may a non-senior role open this document?"""
+    return db.query(
+        exists().where(DocumentVisibility.doc_id == doc_id, _for_role(role))
+    ).scalar()
+
+
+def visible_document_ids(db: Session, role: Optional[str]) -> Optional[np.ndarray]:
+    """Ids of documents a non-senior role may see, for vector-search masking; None = unrestricted."""
+    if role is None:
+        return None
+    rows = db.execute(select(DocumentVisibility.doc_id).where(_for_role(role)).distinct())
+    return np.fromiter((doc_id for (doc_id,) in rows), dtype=np.int32)
@@ -1,6 +1,4 @@
-from passlib.context import CryptContext
-
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+from app.core.security import pwd_context
 
 def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
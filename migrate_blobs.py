@@ -0,0 +1,51 @@
+# Move files referenced by documents into the content-addressed blob store.
+# Safe to re-run: documents already pointing at a blob are only backfilled.
+import os
+import shutil
+import uuid
+
+from app.database import SessionLocal
+from app.models.user import User  # import all models here
+from app.models.document import Document
+from app.models.document_access import DocumentAccess
+from app.services.document_service import BLOB_DIR, blob_path, file_sha256, put_blob, release_blob
+
+print("Migrating uploaded files into the blob store...")
+db = SessionLocal()
+old_paths = set()
+moved = missing = 0
+try:
+    for doc in db.query(Document).all():
+        path = doc.file_path
+        if not path or not os.path.exists(path):
+            print(f"  ! document {doc.id}: file missing ({path})")
+            missing += 1
+            continue
+
+        digest = file_sha256(path)
+        if os.path.abspath(path).startswith(os.path.abspath(BLOB_DIR) + os.sep):
+            doc.content_hash = doc.content_hash or digest
+            doc.file_size = doc.file_size or os.path.getsize(path)
+            continue
+
+        dest = blob_path(digest, doc.filename or path)
+        if not os.path.exists(dest):
+            # copy next to the blob first so the final rename is atomic
+            tmp_path = os.path.join(BLOB_DIR, f".{uuid.uuid4().hex}.part")
+            shutil.copy2(path, tmp_path)
+            put_blob(tmp_path, digest, doc.filename or path)
+
+        doc.file_path = dest
+        doc.content_hash = digest
+        doc.file_size = os.path.getsize(dest)
+        old_paths.add(path)
+        moved += 1
+    db.commit()
+
+    # Old per-upload copies are removed once no document points at them
+    for path in old_paths:
+        release_blob(path, db.query(Document).filter(Document.file_path == path).count())
+finally:
+    db.close()
+
+print(f"Done: {moved} documents moved, {len(old_paths)} old files released, {missing} missing.")
@@ -1,13 +1,16 @@
 from logging.config import fileConfig
 from app.database import Base
+from app.core.config import SQLALCHEMY_DATABASE_URL
 from sqlalchemy import engine_from_config
 from sqlalchemy import pool
-from app.models import user, document
+from app.models import user, document, document_access, summary_cache, document_text, document_visibility
 from alembic import context
 
 # this is the Alembic Config object, which provides
 # access to the values within the .ini file in use.
 config = context.config
+# same DATABASE_URL setting as the app (alembic.ini's sqlalchemy.url is only a fallback)
+config.set_main_option("sqlalchemy.url", SQLALCHEMY_DATABASE_URL.replace("%", "%%"))
 
 # Interpret the config file for Python logging.
 # This line sets up loggers basically.
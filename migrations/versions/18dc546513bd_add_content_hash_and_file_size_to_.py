@@ -0,0 +1,32 @@
+"""Add content_hash and file_size to documents
+
+Revision ID: 18dc546513bd
+Revises: 32407a3a11b4
+Create Date: 2026-10-18 11:03:17.552930
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '18dc546513bd'
+down_revision: Union[str, Sequence[str], None] = '32407a3a11b4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('documents', sa.Column('content_hash', sa.String(length=64), nullable=True))
+    op.add_column('documents', sa.Column('file_size', sa.Integer(), nullable=True))
+    op.create_index(op.f('ix_documents_content_hash'), 'documents', ['content_hash'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_documents_content_hash'), table_name='documents')
+    op.drop_column('documents', 'file_size')
+    op.drop_column('documents', 'content_hash')
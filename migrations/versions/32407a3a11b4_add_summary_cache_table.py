@@ -0,0 +1,47 @@
+"""Add summary_cache table
+
+Revision ID: 32407a3a11b4
+Revises: 51cf2ac9e2b0
+Create Date: 2026-10-18 10:12:41.204518
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '32407a3a11b4'
+down_revision: Union[str, Sequence[str], None] = '51cf2ac9e2b0'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('summary_cache',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('doc_id', sa.Integer(), nullable=False),
+    sa.Column('file_hash', sa.String(length=64), nullable=False),
+    sa.Column('backend', sa.String(), nullable=False),
+    sa.Column('model', sa.String(), nullable=False),
+    sa.Column('params', sa.String(), nullable=False),
+    sa.Column('summary', sa.Text(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('last_used_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['doc_id'], ['documents.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('doc_id', 'file_hash', 'backend', 'model', 'params', name='uq_summary_cache_key')
+    )
+    op.create_index(op.f('ix_summary_cache_id'), 'summary_cache', ['id'], unique=False)
+    op.create_index(op.f('ix_summary_cache_doc_id'), 'summary_cache', ['doc_id'], unique=False)
+    op.create_index(op.f('ix_summary_cache_last_used_at'), 'summary_cache', ['last_used_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_summary_cache_last_used_at'), table_name='summary_cache')
+    op.drop_index(op.f('ix_summary_cache_doc_id'), table_name='summary_cache')
+    op.drop_index(op.f('ix_summary_cache_id'), table_name='summary_cache')
+    op.drop_table('summary_cache')
@@ -0,0 +1,28 @@
+"""Add token_version to users
+
+Revision ID: 6e2f0c8d4a91
+Revises: bfbf8d707c8e
+Create Date: 2026-10-18 14:02:47.381520
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '6e2f0c8d4a91'
+down_revision: Union[str, Sequence[str], None] = 'bfbf8d707c8e'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('users', sa.Column('token_version', sa.Integer(), server_default='0', nullable=False))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('users', 'token_version')
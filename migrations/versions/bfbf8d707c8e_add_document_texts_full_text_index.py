@@ -0,0 +1,36 @@
+"""Add document_texts full-text index
+
+Revision ID: bfbf8d707c8e
+Revises: 18dc546513bd
+Create Date: 2026-10-18 11:41:05.127764
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = 'bfbf8d707c8e'
+down_revision: Union[str, Sequence[str], None] = '18dc546513bd'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('document_texts',
+    sa.Column('doc_id', sa.Integer(), nullable=False),
+    sa.Column('content', sa.Text(), nullable=False),
+    sa.Column('search_vector', postgresql.TSVECTOR(), nullable=True),
+    sa.ForeignKeyConstraint(['doc_id'], ['documents.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('doc_id')
+    )
+    op.create_index('ix_document_texts_search_vector', 'document_texts', ['search_vector'], unique=False, postgresql_using='gin')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_document_texts_search_vector', table_name='document_texts', postgresql_using='gin')
+    op.drop_table('document_texts')
@@ -0,0 +1,54 @@
+"""Add document_visibility table
+
+Revision ID: c3d91f27a5e4
+Revises: 6e2f0c8d4a91
+Create Date: 2026-10-18 15:26:09.512803
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c3d91f27a5e4'
+down_revision: Union[str, Sequence[str], None] = '6e2f0c8d4a91'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    bind = op.get_bind()
+    # The app's create_all may already have created the table (and its index) on startup
+    if not sa.inspect(bind).has_table('document_visibility'):
+        op.create_table('document_visibility',
+        sa.Column('role', sa.String(), nullable=False),
+        sa.Column('doc_id', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['doc_id'], ['documents.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('role', 'doc_id')
+        )
+    if 'ix_document_visibility_doc_id' not in {ix['name'] for ix in sa.inspect(bind).get_indexes('document_visibility')}:
+        op.create_index('ix_document_visibility_doc_id', 'document_visibility', ['doc_id'], unique=False)
+
+    # Backfill from the current rules: All Employees -> "*", otherwise one row per granted role.
+    # Rows the app already wrote are skipped, so re-running is harmless.
+    op.execute(
+        "INSERT INTO document_visibility (role, doc_id) "
+        "SELECT '*', d.id FROM documents d WHERE d.access_role = 'All Employees' "
+        "AND NOT EXISTS (SELECT 1 FROM document_visibility v WHERE v.role = '*' AND v.doc_id = d.id)"
+    )
+    op.execute(
+        "INSERT INTO document_visibility (role, doc_id) "
+        "SELECT DISTINCT a.role, a.doc_id FROM document_access a "
+        "JOIN documents d ON d.id = a.doc_id "
+        "WHERE a.role IS NOT NULL AND a.role <> '*' AND (d.access_role IS NULL OR d.access_role <> 'All Employees') "
+        "AND NOT EXISTS (SELECT 1 FROM document_visibility v WHERE v.role = a.role AND v.doc_id = a.doc_id)"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_document_visibility_doc_id', table_name='document_visibility')
+    op.drop_table('document_visibility')
@@ -0,0 +1,40 @@
+"""Add indexes for hot query columns
+
+Revision ID: d8a4b6e1f352
+Revises: c3d91f27a5e4
+Create Date: 2026-10-18 16:10:44.207316
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd8a4b6e1f352'
+down_revision: Union[str, Sequence[str], None] = 'c3d91f27a5e4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_documents_uploaded_at_id', 'documents', ['uploaded_at', 'id'], unique=False)
+    op.create_index('ix_documents_department_uploaded_at_id', 'documents', ['department', 'uploaded_at', 'id'], unique=False)
+    op.create_index('ix_documents_access_role_uploaded_at_id', 'documents', ['access_role', 'uploaded_at', 'id'], unique=False)
+    op.create_index(op.f('ix_documents_file_path'), 'documents', ['file_path'], unique=False)
+    op.create_index(op.f('ix_documents_user_id'), 'documents', ['user_id'], unique=False)
+    op.create_index('ix_document_access_doc_id', 'document_access', ['doc_id'], unique=False)
+    op.create_index('ix_summary_cache_file_hash_backend_model', 'summary_cache', ['file_hash', 'backend', 'model'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_summary_cache_file_hash_backend_model', table_name='summary_cache')
+    op.drop_index('ix_document_access_doc_id', table_name='document_access')
+    op.drop_index(op.f('ix_documents_user_id'), table_name='documents')
+    op.drop_index(op.f('ix_documents_file_path'), table_name='documents')
+    op.drop_index('ix_documents_access_role_uploaded_at_id', table_name='documents')
+    op.drop_index('ix_documents_department_uploaded_at_id', table_name='documents')
+    op.drop_index('ix_documents_uploaded_at_id', table_name='documents')
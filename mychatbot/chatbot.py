@@ -1,40 +1,156 @@
-from transformers import AutoModelForSeq2SeqLM, AutoTokenizer
-import torch
-import requests
-import json
+import os
+import time
+import asyncio
+import threading
+from collections import OrderedDict
 
-# Load local LLM
-tokenizer = AutoTokenizer.from_pretrained("google/flan-t5-small")
-model = AutoModelForSeq2SeqLM.from_pretrained("google/flan-t5-small")
+from starlette.concurrency import run_in_threadpool
 
-RASA_API = "http://127.0.0.1:5005/webhooks/rest/webhook"
+from mychatbot.model_server import model_server, MAX_INPUT_TOKENS
+from mychatbot.rasa_client import get_rasa_response, aget_rasa_response
+
+# Retrieval-augmented answers: top-k document chunks are packed into the prompt
+# until the model's input budget (flan-t5-small: 512 tokens) is used up.
+RAG_TOP_K = int(os.getenv("RAG_TOP_K", "5"))
+RAG_MIN_SCORE = float(os.getenv("RAG_MIN_SCORE", "0.35"))
+# Longer questions are cut so the prompt still fits (and keeps room for context);
+# otherwise the model's own truncation would drop the end of the prompt: the question.
+RAG_MAX_QUESTION_TOKENS = int(os.getenv("RAG_MAX_QUESTION_TOKENS", str(MAX_INPUT_TOKENS // 2)))
+RETRIEVAL_CACHE_SIZE = 512
+RETRIEVAL_CACHE_TTL = 300  # seconds
+
+# Race mode: if Rasa has not answered within RASA_RACE_DELAY seconds, start LLM
+# generation speculatively and use whichever reply is usable first (Rasa preferred).
+RASA_RACE_MODE = os.getenv("RASA_RACE_MODE", "0") == "1"
+RASA_RACE_DELAY = float(os.getenv("RASA_RACE_DELAY", "0.3"))
+
+# (normalized query, access key) -> (expires_at, chunks)
+_retrieval_cache: OrderedDict = OrderedDict()
+_retrieval_lock = threading.Lock()
+
+
+# ---------------- Retrieval ----------------
+def retrieve_chunks(message, allowed_doc_ids=None, access_key="*"):
+    """
+    Top-k document chunks for a question, cached per (query, access_key) for a few minutes.
+    access_key must identify allowed_doc_ids (e.g. the user's role) so cached hits never leak.
+    """
+    from app.services.semantic_search import semantic_search
+
+    key = (" ".join(message.lower().split()), access_key)
+    now = time.time()
+    with _retrieval_lock:
+        hit = _retrieval_cache.get(key)
+        if hit and hit[0] > now:
+            _retrieval_cache.move_to_end(key)
+            return hit[1]
 
-def get_rasa_response(message):
     try:
-        resp = requests.post(RASA_API, json={"sender": "user", "message": message})
-        data = resp.json()
-        if data:
-            return " ".join([d.get("text","") for d in data])
-    except:
-        pass
-    return None
+        hits = semantic_search(message, RAG_TOP_K, allowed_doc_ids)
+    except Exception:
+        # no embedding model / index available: answer without documents
+        return []
+    chunks = [c for c in hits if c["score"] >= RAG_MIN_SCORE]
+
+    with _retrieval_lock:
+        _retrieval_cache[key] = (now + RETRIEVAL_CACHE_TTL, chunks)
+        _retrieval_cache.move_to_end(key)
+        while len(_retrieval_cache) > RETRIEVAL_CACHE_SIZE:
+            _retrieval_cache.popitem(last=False)
+    return chunks
+
+
+def clear_retrieval_cache():
+    """Forget cached retrievals; call when documents are added, removed or change visibility."""
+    with _retrieval_lock:
+        _retrieval_cache.clear()
+
+
+def build_prompt(message, chunks):
+    """Pack the best chunks into the prompt within MAX_INPUT_TOKENS; returns (prompt, cited doc ids)."""
+    tokenizer, _ = model_server.load()
+    question_ids = tokenizer.encode(message, add_special_tokens=False)
+    if len(question_ids) > RAG_MAX_QUESTION_TOKENS:
+        message = tokenizer.decode(question_ids[:RAG_MAX_QUESTION_TOKENS], skip_special_tokens=True)
+    header = "Answer the question using only the context below.\n\nContext:\n"
+    footer = f"\n\nQuestion: {message}\nAnswer:"
+    budget = MAX_INPUT_TOKENS - len(tokenizer.encode(header + footer))
 
+    context, cited = [], []
+    for chunk in chunks:
+        tag = f"[doc {chunk['doc_id']}] "
+        piece = f"{tag}{chunk['text']}\n"
+        ids = tokenizer.encode(piece, add_special_tokens=False)
+        if len(ids) > budget:
+            if context:
+                break
+            # even the best chunk is too long: keep as much of it as fits, but never
+            # a bare tag (an empty piece must not be cited)
+            if budget <= len(tokenizer.encode(tag, add_special_tokens=False)):
+                break
+            ids = ids[:budget]
+            piece = tokenizer.decode(ids, skip_special_tokens=True)
+        context.append(piece)
+        budget -= len(ids)
+        if chunk["doc_id"] not in cited:
+            cited.append(chunk["doc_id"])
+    return header + "".join(context) + footer, cited
+
+
+# ---------------- Generation ----------------
 def get_llm_response(message):
-    inputs = tokenizer("Answer: " + message, return_tensors="pt")
-    outputs = model.generate(**inputs, max_new_tokens=100)
-    return tokenizer.decode(outputs[0], skip_special_tokens=True)
+    return model_server.generate("Answer: " + message)
+
 
-def chatbot_response(message):
-    # 1️⃣ Try Rasa first
+def chatbot_response(message, allowed_doc_ids=None, access_key="*"):
+    """
+    Reply to a chat message: {"reply", "source", "citations"}.
+    allowed_doc_ids restricts retrieval to documents the caller may open (None = all).
+    """
+    # 1️⃣ Questions about our documents: answer from retrieved chunks, citing them
+    chunks = retrieve_chunks(message, allowed_doc_ids, access_key)
+    if chunks:
+        prompt, cited = build_prompt(message, chunks)
+        return {"reply": model_server.generate(prompt), "source": "documents", "citations": cited}
+    # 2️⃣ Small talk and workflows: Rasa
     rasa_reply = get_rasa_response(message)
     if rasa_reply:
-        return rasa_reply
-    # 2️⃣ Fallback to local LLM
-    return get_llm_response(message)
-
-# Example
-while True:
-    msg = input("You: ")
-    if msg.lower() in ["exit", "quit"]:
-        break
-    print("Ameya:", chatbot_response(msg))
+        return {"reply": rasa_reply, "source": "rasa", "citations": []}
+    # 3️⃣ Fallback to local LLM without context
+    return {"reply": get_llm_response(message), "source": "llm", "citations": []}
+
+
+async def achatbot_response(message, allowed_doc_ids=None, access_key="*", sender="user"):
+    """
+    Async chatbot_response for the API: Rasa is called over a pooled, circuit-broken
+    client and generation goes through the model server's micro-batcher.
+    """
+    chunks = await run_in_threadpool(retrieve_chunks, message, allowed_doc_ids, access_key)
+    if chunks:
+        prompt, cited = await run_in_threadpool(build_prompt, message, chunks)
+        return {"reply": await model_server.agenerate(prompt), "source": "documents", "citations": cited}
+
+    rasa_task = asyncio.create_task(aget_rasa_response(message, sender))
+    llm_task = None
+    if RASA_RACE_MODE:
+        done, _ = await asyncio.wait({rasa_task}, timeout=RASA_RACE_DELAY)
+        if not done:
+            # Rasa is slow: start the LLM now so a Rasa failure costs no extra wait
+            llm_task = asyncio.create_task(model_server.agenerate("Answer: " + message))
+
+    rasa_reply = await rasa_task
+    if rasa_reply:
+        if llm_task:
+            llm_task.cancel()
+        return {"reply": rasa_reply, "source": "rasa", "citations": []}
+    reply = await (llm_task or model_server.agenerate("Answer: " + message))
+    return {"reply": reply, "source": "llm", "citations": []}
+
+
+if __name__ == "__main__":
+    # Example: python -m mychatbot.chatbot (from the project root)
+    while True:
+        msg = input("You: ")
+        if msg.lower() in ["exit", "quit"]:
+            break
+        print("Ameya:", chatbot_response(msg)["reply"])
@@ -0,0 +1,134 @@
+import os
+import time
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# Long-lived flan-t5 service: concurrent prompts are collected for a few ms and run
+# as one padded generate() batch, which multiplies tokens/sec on CPU.
+LLM_MODEL = os.getenv("CHATBOT_MODEL", "google/flan-t5-small")
+MAX_INPUT_TOKENS = int(os.getenv("CHATBOT_MAX_INPUT_TOKENS", "512"))
+MAX_NEW_TOKENS = int(os.getenv("CHATBOT_MAX_NEW_TOKENS", "100"))
+MAX_BATCH_SIZE = int(os.getenv("CHATBOT_MAX_BATCH", "16"))
+MAX_BATCH_WAIT_MS = float(os.getenv("CHATBOT_BATCH_WAIT_MS", "10"))
+TORCH_THREADS = int(os.getenv("CHATBOT_TORCH_THREADS", "0"))  # 0 = torch default
+
+
+class ModelServer:
+    def __init__(self):
+        self.tokenizer = None
+        self.model = None
+        self._load_lock = threading.Lock()
+        self._queue: asyncio.Queue | None = None
+        self._batcher: asyncio.Task | None = None
+        # generate() runs on one dedicated thread; batching, not threads, gives the parallelism
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="llm")
+        self.metrics = {
+            "requests": 0,
+            "batches": 0,
+            "batched_prompts": 0,
+            "generated_tokens": 0,
+            "generate_seconds": 0.0,
+            "total_latency_seconds": 0.0,
+        }
+
+    # ---------------- Loading ----------------
+    def load(self):
+        """Load tokenizer + model once (safe to call from any thread)."""
+        with self._load_lock:
+            if self.model is None:
+                import torch
+                from transformers import AutoModelForSeq2SeqLM, AutoTokenizer
+                if TORCH_THREADS:
+                    torch.set_num_threads(TORCH_THREADS)
+                self.tokenizer = AutoTokenizer.from_pretrained(LLM_MODEL)
+                self.model = AutoModelForSeq2SeqLM.from_pretrained(LLM_MODEL).eval()
+        return self.tokenizer, self.model
+
+    def warm_up(self):
+        """Load the model and run one tiny generation so the first real request is not slow."""
+        self.load()
+        self.generate_batch(["Answer: hello"], max_new_tokens=1)
+
+    # ---------------- Generation ----------------
+    def generate_batch(self, prompts, max_new_tokens=MAX_NEW_TOKENS):
+        """Pad prompts into one batch and generate; returns one string per prompt."""
+        import torch
+        tokenizer, model = self.load()
+        inputs = tokenizer(prompts, return_tensors="pt", padding=True, truncation=True, max_length=MAX_INPUT_TOKENS)
+        started = time.perf_counter()
+        with torch.inference_mode():
+            outputs = model.generate(**inputs, max_new_tokens=max_new_tokens)
+        self.metrics["generate_seconds"] += time.perf_counter() - started
+        self.metrics["generated_tokens"] += int((outputs != tokenizer.pad_token_id).sum())
+        return tokenizer.batch_decode(outputs, skip_special_tokens=True)
+
+    def generate(self, prompt):
+        """Synchronous single-prompt path (REPL / scripts)."""
+        self.metrics["requests"] += 1
+        return self.generate_batch([prompt])[0]
+
+    async def agenerate(self, prompt):
+        """Queue a prompt for the micro-batcher and wait for its completion."""
+        if self._batcher is None:
+            self.start()
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((prompt, future, time.perf_counter()))
+        return await future
+
+    # ---------------- Micro-batcher ----------------
+    def start(self):
+        self._queue = asyncio.Queue()
+        self._batcher = asyncio.create_task(self._batch_loop())
+
+    async def stop(self):
+        if self._batcher:
+            self._batcher.cancel()
+            await asyncio.gather(self._batcher, return_exceptions=True)
+            self._batcher = None
+
+    async def _batch_loop(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            # collect whatever else arrives within the batching window
+            deadline = loop.time() + MAX_BATCH_WAIT_MS / 1000
+            while len(batch) < MAX_BATCH_SIZE:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            prompts = [prompt for prompt, _, _ in batch]
+            try:
+                replies = await loop.run_in_executor(self._executor, self.generate_batch, prompts)
+            except Exception as e:
+                for _, future, _ in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+
+            now = time.perf_counter()
+            self.metrics["batches"] += 1
+            self.metrics["batched_prompts"] += len(batch)
+            for (_, future, queued_at), reply in zip(batch, replies):
+                self.metrics["requests"] += 1
+                self.metrics["total_latency_seconds"] += now - queued_at
+                if not future.done():
+                    future.set_result(reply)
+
+    def stats(self):
+        m = self.metrics
+        return {
+            **m,
+            "avg_batch_size": round(m["batched_prompts"] / m["batches"], 2) if m["batches"] else 0,
+            "avg_latency_ms": round(1000 * m["total_latency_seconds"] / m["batched_prompts"], 1) if m["batched_prompts"] else 0,
+            "tokens_per_second": round(m["generated_tokens"] / m["generate_seconds"], 1) if m["generate_seconds"] else 0,
+            "loaded": self.model is not None,
+        }
+
+
+model_server = ModelServer()
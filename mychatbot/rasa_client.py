@@ -0,0 +1,136 @@
+import os
+import time
+import asyncio
+import threading
+from typing import Optional
+
+import httpx
+import requests
+
+RASA_API = os.getenv("RASA_API", "http://127.0.0.1:5005/webhooks/rest/webhook")
+
+# Strict timeouts: a down Rasa must fail fast instead of waiting for the OS connect timeout
+RASA_CONNECT_TIMEOUT = float(os.getenv("RASA_CONNECT_TIMEOUT", "0.5"))
+RASA_TIMEOUT = float(os.getenv("RASA_TIMEOUT", "3"))
+
+# After RASA_FAILURE_THRESHOLD consecutive failures Rasa is skipped for RASA_COOLDOWN seconds
+RASA_FAILURE_THRESHOLD = int(os.getenv("RASA_FAILURE_THRESHOLD", "3"))
+RASA_COOLDOWN = float(os.getenv("RASA_COOLDOWN", "30"))
+
+
+class CircuitBreaker:
+    """
+    closed    -> calls go through; consecutive failures are counted
+    open      -> calls are skipped until the cooldown has passed
+    half-open -> one trial call; success closes the circuit, failure re-opens it
+    """
+
+    def __init__(self, failure_threshold: int, cooldown: float):
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.cooldown:
+            return "half-open"
+        return "open"
+
+    def allow(self) -> bool:
+        with self._lock:
+            state = self.state
+            if state == "closed":
+                return True
+            if state == "half-open" and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._trial_in_flight = False
+
+    def release(self) -> None:
+        """Forget an abandoned trial call (e.g. cancelled) without judging Rasa's health."""
+        with self._lock:
+            self._trial_in_flight = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            self._trial_in_flight = False
+            if self.opened_at is not None or self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+
+
+breaker = CircuitBreaker(RASA_FAILURE_THRESHOLD, RASA_COOLDOWN)
+
+_client: Optional[httpx.AsyncClient] = None
+_session = requests.Session()   # pooled connections for the synchronous (REPL) path
+
+
+def _reply_text(data) -> Optional[str]:
+    if data:
+        return " ".join([d.get("text", "") for d in data])
+    return None
+
+
+def get_client() -> httpx.AsyncClient:
+    global _client
+    if _client is None or _client.is_closed:
+        _client = httpx.AsyncClient(
+            timeout=httpx.Timeout(RASA_TIMEOUT, connect=RASA_CONNECT_TIMEOUT),
+            limits=httpx.Limits(max_connections=20, max_keepalive_connections=10),
+        )
+    return _client
+
+
+async def close_client() -> None:
+    global _client
+    if _client is not None:
+        await _client.aclose()
+    _client = None
+
+
+async def aget_rasa_response(message: str, sender: str = "user") -> Optional[str]:
+    """Ask Rasa over the pooled async client; None on failure, empty reply or open circuit."""
+    if not breaker.allow():
+        return None
+    try:
+        resp = await get_client().post(RASA_API, json={"sender": sender, "message": message})
+        resp.raise_for_status()
+        data = resp.json()
+    except (httpx.HTTPError, ValueError):
+        breaker.record_failure()
+        return None
+    except asyncio.CancelledError:
+        breaker.release()
+        raise
+    breaker.record_success()
+    return _reply_text(data)
+
+
+def get_rasa_response(message: str, sender: str = "user") -> Optional[str]:
+    """Synchronous variant with the same timeouts and circuit breaker."""
+    if not breaker.allow():
+        return None
+    try:
+        resp = _session.post(
+            RASA_API,
+            json={"sender": sender, "message": message},
+            timeout=(RASA_CONNECT_TIMEOUT, RASA_TIMEOUT),
+        )
+        resp.raise_for_status()
+        data = resp.json()
+    except (requests.RequestException, ValueError):
+        breaker.record_failure()
+        return None
+    breaker.record_success()
+    return _reply_text(data)
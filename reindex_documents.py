@@ -0,0 +1,21 @@
+# Rebuild the keyword and semantic search indexes for every stored document (e.g. after migrating or upgrading extractors).
+from app.database import Base, engine, SessionLocal
+from app.models.user import User  # import all models here
+from app.models.document import Document
+from app.models.document_access import DocumentAccess
+from app.services.search_service import index_document_text
+from app.services.semantic_search import index_document_embeddings
+
+Base.metadata.create_all(bind=engine)
+
+db = SessionLocal()
+try:
+    doc_ids = [doc_id for (doc_id,) in db.query(Document.id).order_by(Document.id)]
+finally:
+    db.close()
+
+print(f"Indexing {len(doc_ids)} documents...")
+for doc_id in doc_ids:
+    index_document_text(doc_id)
+    index_document_embeddings(doc_id)
+print("Search indexes rebuilt.")
@@ -0,0 +1,41 @@
+# tests/conftest.py
+import os
+import tempfile
+import uuid
+
+import pytest
+from fastapi.testclient import TestClient
+
+# Point every on-disk store at a throwaway directory before any app module is imported
+# (their settings are read at import time).
+_TMP = tempfile.mkdtemp(prefix="smartdocs-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_TMP, 'test.db')}"
+os.environ["TEXT_CACHE_DIR"] = os.path.join(_TMP, "text_cache")
+os.environ["BLOB_DIR"] = os.path.join(_TMP, "blobs")
+os.environ["PREVIEW_DIR"] = os.path.join(_TMP, "preview_cache")
+os.environ["VECTOR_DIR"] = os.path.join(_TMP, "vector_index")
+os.environ["BCRYPT_ROUNDS"] = "4"
+os.environ["CHATBOT_WARMUP"] = "0"
+
+
+@pytest.fixture
+def client():
+    from app.main import app
+    with TestClient(app) as client:
+        yield client
+
+
+@pytest.fixture
+def login(client):
+    """Register a fresh user with the given role and return their Authorization header."""
+    def login(role: str = "Manager", password: str = "secret-pw") -> dict:
+        username = f"user-{uuid.uuid4().hex[:12]}"
+        response = client.post("/auth/register", json={
+            "username": username, "full_name": username, "email": f"{username}@example.com",
+            "password": password, "role": role,
+        })
+        assert response.status_code == 200, response.text
+        response = client.post("/auth/login", json={"username": username, "password": password})
+        assert response.status_code == 200, response.text
+        return {"Authorization": f"Bearer {response.json()['access_token']}"}
+    return login
@@ -0,0 +1,114 @@
+# tests/test_auth_cache.py
+# token -> principal cache: hits skip the users query, role changes and revocation take
+# effect on the next request, and the p50 auth overhead per request is reported.
+import statistics
+import time
+from contextlib import contextmanager
+
+from sqlalchemy import event
+
+from app.database import SessionLocal, engine
+from app.models.user import User
+from app.routes.auth import get_current_user
+from app.services import auth_service
+from app.services.auth_service import clear_principal_cache, revoke_tokens
+
+REQUESTS = 200
+
+
+@contextmanager
+def count_user_queries():
+    statements = []
+
+    def before(conn, cursor, statement, parameters, context, executemany):
+        if "FROM users" in statement:
+            statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", before)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", before)
+
+
+def _me(client, headers) -> dict:
+    response = client.get("/auth/me", headers=headers)
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+def _update_user(user_id: int, change) -> None:
+    db = SessionLocal()
+    try:
+        change(db.get(User, user_id))
+        db.commit()
+    finally:
+        db.close()
+
+
+def test_cached_principal_skips_the_users_query(client, login):
+    headers = login("Manager")
+    _me(client, headers)
+    with count_user_queries() as queries:
+        for _ in range(5):
+            assert _me(client, headers)["role"] == "Manager"
+    assert queries == []
+
+
+def test_role_change_takes_effect_on_next_request(client, login):
+    headers = login("Manager")
+    user_id = _me(client, headers)["id"]
+
+    _update_user(user_id, lambda user: setattr(user, "role", "HR Executive"))
+    assert client.get("/auth/me", headers=headers).status_code == 401   # token carried the old role
+
+
+def test_unrelated_update_keeps_token_but_refreshes_principal(client, login):
+    headers = login("Manager")
+    user_id = _me(client, headers)["id"]
+
+    _update_user(user_id, lambda user: setattr(user, "full_name", "Renamed User"))
+    assert _me(client, headers)["full_name"] == "Renamed User"
+
+
+def test_revoked_tokens_are_rejected(client, login):
+    headers = login("Manager")
+    user_id = _me(client, headers)["id"]
+
+    _update_user(user_id, revoke_tokens)
+    assert client.get("/auth/me", headers=headers).status_code == 401
+
+
+def test_cached_entry_expires_after_ttl(client, login, monkeypatch):
+    headers = login("Manager")
+    _me(client, headers)
+    monkeypatch.setattr(auth_service, "PRINCIPAL_CACHE_TTL", 0)
+    clear_principal_cache()
+    _me(client, headers)
+    with count_user_queries() as queries:
+        _me(client, headers)
+    assert len(queries) == 1
+
+
+def _p50_auth_ms(token: str, cached: bool) -> float:
+    timings = []
+    db = SessionLocal()
+    try:
+        for _ in range(REQUESTS):
+            if not cached:
+                clear_principal_cache()
+            started = time.perf_counter()
+            get_current_user(token, db)
+            timings.append(time.perf_counter() - started)
+    finally:
+        db.close()
+    return 1000 * statistics.median(timings)
+
+
+def test_p50_auth_overhead(client, login):
+    token = login("Manager")["Authorization"].split()[1]
+    uncached = _p50_auth_ms(token, cached=False)
+    cached = _p50_auth_ms(token, cached=True)
+    print(f"\np50 auth overhead per request: {uncached:.3f} ms uncached, {cached:.3f} ms cached")
+    assert cached < uncached
+    assert cached < 1.0
@@ -0,0 +1,84 @@
+# tests/test_blob_store.py
+import os
+import threading
+
+from app.core.file_lock import lock_file, unlock_file
+from app.database import SessionLocal
+from app.models.document import Document
+from app.services.document_service import blob_lock
+
+
+def _upload(client, headers, content: bytes, name: str = "notes.txt") -> dict:
+    response = client.post(
+        "/documents/documents/upload",
+        headers=headers,
+        files={"file": (name, content, "text/plain")},
+        data={"title": name, "access_roles": '["All Employees"]'},
+    )
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+def _file_path(doc_id: int) -> str:
+    with SessionLocal() as db:
+        return db.query(Document.file_path).filter(Document.id == doc_id).scalar()
+
+
+def test_identical_uploads_share_one_blob(client, login):
+    headers = login("Manager")
+    first = _upload(client, headers, b"shared blob contents 1")
+    second = _upload(client, headers, b"shared blob contents 1", name="copy.txt")
+    path = _file_path(first["id"])
+    assert path == _file_path(second["id"]) and os.path.exists(path)
+
+    assert client.delete(f"/documents/documents/delete/{first['id']}", headers=headers).status_code == 200
+    assert os.path.exists(path)
+    assert client.delete(f"/documents/documents/delete/{second['id']}", headers=headers).status_code == 200
+    assert not os.path.exists(path)
+
+
+def test_delete_waits_for_an_upload_of_the_same_content(client, login):
+    headers = login("Manager")
+    doc = _upload(client, headers, b"shared blob contents 2")
+    with SessionLocal() as db:
+        original = db.query(Document).filter(Document.id == doc["id"]).one()
+        path, content_hash = original.file_path, original.content_hash
+
+    deleted = threading.Event()
+
+    def delete():
+        client.delete(f"/documents/documents/delete/{doc['id']}", headers=headers)
+        deleted.set()
+
+    # an upload of the same content has published the blob but not committed its document yet
+    with blob_lock(content_hash):
+        worker = threading.Thread(target=delete)
+        worker.start()
+        assert not deleted.wait(0.5), "delete must wait for the upload to commit"
+        with SessionLocal() as db:
+            db.add(Document(filename="copy.txt", file_path=path, content_hash=content_hash))
+            db.commit()
+    worker.join()
+
+    assert deleted.is_set()
+    assert os.path.exists(path)
+
+
+def test_file_lock_excludes_other_handles(tmp_path):
+    path = tmp_path / "shared.lock"
+    acquired = threading.Event()
+
+    def contend():
+        with open(path, "a") as f:
+            lock_file(f)
+            acquired.set()
+            unlock_file(f)
+
+    with open(path, "a") as f:
+        lock_file(f)
+        worker = threading.Thread(target=contend)
+        worker.start()
+        assert not acquired.wait(0.3), "a second handle must wait for the lock"
+        unlock_file(f)
+    worker.join()
+    assert acquired.is_set()
@@ -0,0 +1,58 @@
+import pytest
+
+from mychatbot import chatbot
+from mychatbot.model_server import model_server
+
+
+class WordTokenizer:
+    """One token per whitespace-separated word, plus an end-of-sequence token."""
+
+    def encode(self, text, add_special_tokens=True):
+        ids = text.split()
+        return ids + ["</s>"] if add_special_tokens else ids
+
+    def decode(self, ids, skip_special_tokens=False):
+        return " ".join(i for i in ids if not (skip_special_tokens and i == "</s>"))
+
+
+@pytest.fixture
+def tokenizer(monkeypatch):
+    tok = WordTokenizer()
+    monkeypatch.setattr(model_server, "load", lambda: (tok, None))
+    monkeypatch.setattr(chatbot, "MAX_INPUT_TOKENS", 64)
+    monkeypatch.setattr(chatbot, "RAG_MAX_QUESTION_TOKENS", 32)
+    return tok
+
+
+def chunk(doc_id, words):
+    return {"doc_id": doc_id, "text": " ".join(f"w{i}" for i in range(words)), "score": 1.0}
+
+
+def test_prompt_fits_and_cites_packed_chunks(tokenizer):
+    prompt, cited = chatbot.build_prompt("what is the leave policy?", [chunk(1, 10), chunk(2, 10), chunk(3, 40)])
+    assert cited == [1, 2]
+    assert len(tokenizer.encode(prompt)) <= 64
+    assert prompt.endswith("Question: what is the leave policy?\nAnswer:")
+
+
+def test_long_best_chunk_is_cut_to_fit(tokenizer):
+    prompt, cited = chatbot.build_prompt("leave policy?", [chunk(7, 200)])
+    assert cited == [7]
+    assert "[doc 7] w0" in prompt
+    assert len(tokenizer.encode(prompt)) <= 64
+
+
+def test_long_question_is_capped_and_kept(tokenizer):
+    question = " ".join(f"q{i}" for i in range(500))
+    prompt, cited = chatbot.build_prompt(question, [chunk(1, 10)])
+    assert len(tokenizer.encode(prompt)) <= 64
+    assert "Question: q0 q1" in prompt and prompt.endswith("q31\nAnswer:")
+    assert cited == [1]
+
+
+def test_no_room_left_cites_nothing(tokenizer, monkeypatch):
+    monkeypatch.setattr(chatbot, "RAG_MAX_QUESTION_TOKENS", 60)
+    question = " ".join(f"q{i}" for i in range(500))
+    prompt, cited = chatbot.build_prompt(question, [chunk(1, 10)])
+    assert cited == []
+    assert "[doc" not in prompt
@@ -0,0 +1,60 @@
+import sqlite3
+
+import pytest
+from sqlalchemy.exc import TimeoutError as PoolTimeout
+
+from app.database import PoolMetrics, TimedQueuePool
+
+
+class Pool(TimedQueuePool):
+    metrics = PoolMetrics()
+
+
+@pytest.fixture(autouse=True)
+def fresh_metrics():
+    Pool.metrics = PoolMetrics()
+
+
+def test_exhausted_pool_counts_a_timeout():
+    pool = Pool(lambda: sqlite3.connect(":memory:"), pool_size=1, max_overflow=0, timeout=0.05)
+    held = pool.connect()
+    with pytest.raises(PoolTimeout):
+        pool.connect()
+    held.close()
+    assert Pool.metrics.stats()["timeouts"] == 1
+    assert Pool.metrics.stats()["checkouts"] == 1
+
+
+def test_connect_error_is_not_a_timeout():
+    def refuse():
+        raise ConnectionRefusedError("connection refused")
+
+    pool = Pool(refuse, pool_size=1, max_overflow=0, timeout=0.05)
+    with pytest.raises(Exception):
+        pool.connect()
+    assert Pool.metrics.stats()["timeouts"] == 0
+
+
+def test_db_metrics_are_admin_only(client, login):
+    assert client.get("/metrics/db").status_code == 401
+    assert client.get("/metrics/db", headers=login("Manager")).status_code == 403
+    response = client.get("/metrics/db", headers=login("Admin"))
+    assert response.status_code == 200
+    assert "checkouts" in response.json()["sync"]
+
+
+def test_document_list_runs_on_the_async_engine(client, login):
+    from app.database import pool_stats
+
+    headers = login("Manager")
+    response = client.post(
+        "/documents/documents/upload", headers=headers,
+        files={"file": ("async.txt", b"listed through the async session", "text/plain")},
+        data={"title": "async.txt", "access_roles": '["All Employees"]'},
+    )
+    assert response.status_code == 200, response.text
+
+    response = client.get("/documents/documents/list", headers=headers, params={"fields": "id,title"})
+    assert response.status_code == 200
+    assert {"id": response.json()[0]["id"], "title": "async.txt"} in response.json()
+    assert "async" in pool_stats()
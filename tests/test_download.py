@@ -0,0 +1,134 @@
+# tests/test_download.py
+import time
+from urllib.parse import parse_qs, urlsplit
+
+from app.core.security import sign_download, verify_download_signature
+from app.database import SessionLocal
+from app.models.document import Document
+
+CONTENT = b"0123456789abcdefghijklmnopqrstuvwxyz"
+
+
+def _upload(client, headers, content: bytes = CONTENT, name: str = "notes.txt") -> dict:
+    response = client.post(
+        "/documents/documents/upload",
+        headers=headers,
+        files={"file": (name, content, "text/plain")},
+        data={"title": name, "access_roles": '["All Employees"]'},
+    )
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+def _signed_params(client, headers, doc_id: int) -> dict:
+    response = client.get(f"/documents/documents/{doc_id}/download-url", headers=headers)
+    assert response.status_code == 200, response.text
+    return {k: v[0] for k, v in parse_qs(urlsplit(response.json()["url"]).query).items()}
+
+
+# ---------------- Signed URLs ----------------
+def test_signature_round_trip_and_expiry():
+    expires = int(time.time()) + 60
+    sig = sign_download("ab" * 32, "Budget Report.pdf", expires)
+    assert verify_download_signature("ab" * 32, "Budget Report.pdf", expires, sig)
+    tampered = sig[:-1] + ("B" if sig.endswith("A") else "A")
+    assert not verify_download_signature("ab" * 32, "Budget Report.pdf", expires, tampered)
+
+    past = int(time.time()) - 1
+    assert not verify_download_signature("ab" * 32, "x.pdf", past, sign_download("ab" * 32, "x.pdf", past))
+
+
+def test_non_ascii_signature_is_rejected_not_an_error():
+    expires = int(time.time()) + 60
+    assert not verify_download_signature("ab" * 32, "x.pdf", expires, "é")
+    assert verify_download_signature("ab" * 32, "Résumé.pdf", expires, sign_download("ab" * 32, "Résumé.pdf", expires))
+
+
+def test_signed_url_downloads_the_blob(client, login):
+    headers = login("Manager")
+    params = _signed_params(client, headers, _upload(client, headers, b"signed download body")["id"])
+    response = client.get("/documents/documents/signed", params=params)   # no Authorization needed
+    assert response.status_code == 200
+    assert response.content == b"signed download body"
+
+
+def test_tampered_or_expired_signed_urls_are_forbidden(client, login):
+    headers = login("Manager")
+    params = _signed_params(client, headers, _upload(client, headers, b"tamper target")["id"])
+    for change in ({"h": "0" * 64}, {"name": "other.txt"}, {"exp": str(int(params["exp"]) + 1)},
+                   {"exp": str(int(time.time()) - 1)}, {"sig": "é"}):
+        response = client.get("/documents/documents/signed", params={**params, **change})
+        assert response.status_code == 403, change
+
+
+def test_download_url_needs_a_blob_store_document(client, login):
+    headers = login("Manager")
+    with SessionLocal() as db:
+        legacy = Document(filename="legacy.txt", file_path="uploaded_docs/legacy.txt",
+                          access_role="All Employees", department="Operations")
+        db.add(legacy)
+        db.commit()
+        doc_id = legacy.id
+    response = client.get(f"/documents/documents/{doc_id}/download-url", headers=headers)
+    assert response.status_code == 409
+
+
+# ---------------- Conditional and Range requests ----------------
+def _document(client, headers, content: bytes = CONTENT) -> tuple[str, str]:
+    """(download URL, ETag) of a freshly uploaded document."""
+    url = f"/documents/documents/{_upload(client, headers, content)['id']}"
+    response = client.get(url, headers=headers)
+    assert response.status_code == 200 and response.content == content
+    return url, response.headers["etag"]
+
+
+def test_if_none_match_returns_304(client, login):
+    headers = login("Manager")
+    url, etag = _document(client, headers, b"etag body " + CONTENT)
+    assert etag.startswith('"') and etag.endswith('"')
+
+    response = client.get(url, headers={**headers, "If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.content == b""
+    assert response.headers["etag"] == etag
+    assert client.get(url, headers={**headers, "If-None-Match": '"other"'}).status_code == 200
+
+
+def test_single_range(client, login):
+    headers = login("Manager")
+    url, _ = _document(client, headers)
+
+    response = client.get(url, headers={**headers, "Range": "bytes=10-19"})
+    assert response.status_code == 206
+    assert response.headers["content-range"] == f"bytes 10-19/{len(CONTENT)}"
+    assert response.content == CONTENT[10:20]
+
+
+def test_multi_range_names_boundary_in_content_type(client, login):
+    headers = login("Manager")
+    url, _ = _document(client, headers, CONTENT + b"-multi")
+
+    response = client.get(url, headers={**headers, "Range": "bytes=0-4,20-24"})
+    assert response.status_code == 206
+    content_type = response.headers["content-type"]
+    assert content_type.startswith("multipart/byteranges; boundary=")
+    assert "content-range" not in response.headers
+
+    boundary = content_type.split("boundary=", 1)[1]
+    body = response.content.decode()
+    assert body.count(f"--{boundary}") == 3   # two parts + closing delimiter
+    assert f"Content-Range: bytes 0-4/{len(CONTENT) + 6}" in body and "01234" in body
+    assert f"Content-Range: bytes 20-24/{len(CONTENT) + 6}" in body and "klmno" in body
+
+
+def test_if_range_mismatch_sends_the_whole_file(client, login):
+    headers = login("Manager")
+    url, etag = _document(client, headers, CONTENT + b"-if-range")
+
+    response = client.get(url, headers={**headers, "Range": "bytes=0-4", "If-Range": '"stale"'})
+    assert response.status_code == 200
+    assert response.content == CONTENT + b"-if-range"
+
+    response = client.get(url, headers={**headers, "Range": "bytes=0-4", "If-Range": etag})
+    assert response.status_code == 206
+    assert response.content == CONTENT[:5]
@@ -0,0 +1,32 @@
+import hashlib
+
+from app.services import document_service
+from app.services.document_service import file_sha256, remember_hash
+
+
+def test_hash_memo_is_bounded_lru(tmp_path, monkeypatch):
+    monkeypatch.setattr(document_service, "HASH_MEMO_SIZE", 3)
+    monkeypatch.setattr(document_service, "_hash_memo", document_service.OrderedDict())
+    paths = []
+    for i in range(5):
+        path = tmp_path / f"f{i}.txt"
+        path.write_bytes(f"file {i}".encode())
+        paths.append(str(path))
+
+    for path in paths[:3]:
+        file_sha256(path)
+    file_sha256(paths[0])           # recently used: survives the next insertions
+    for path in paths[3:]:
+        assert file_sha256(path) == hashlib.sha256(open(path, "rb").read()).hexdigest()
+
+    memo = document_service._hash_memo
+    assert len(memo) == 3
+    assert {key[0] for key in memo} == {str(tmp_path / n) for n in ("f0.txt", "f3.txt", "f4.txt")}
+
+
+def test_remembered_hash_skips_reading(tmp_path, monkeypatch):
+    monkeypatch.setattr(document_service, "_hash_memo", document_service.OrderedDict())
+    path = tmp_path / "upload.bin"
+    path.write_bytes(b"payload")
+    remember_hash(str(path), "precomputed")
+    assert file_sha256(str(path)) == "precomputed"
@@ -0,0 +1,86 @@
+# tests/test_list_benchmark.py
+# Benchmark: /documents/list over 100k documents. Keyset pagination must make a page deep
+# in the listing cost about the same as the first page.
+import asyncio
+import random
+import statistics
+import time
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi import Response
+from sqlalchemy import create_engine, insert, text
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from app.database import Base
+from app.models import document_text  # noqa: F401  (register mapped tables)
+from app.models.document import Document
+from app.models.document_visibility import DocumentVisibility
+from app.models.user import User
+from app.routes.document import encode_cursor, list_documents
+from app.services.auth_service import Principal
+from app.services.visibility_service import ALL_EMPLOYEES, ALL_ROLES
+
+DOCUMENTS = 100_000
+PAGE = 100
+RUNS = 15
+ROLES = ["HR Executive", "Engineer", "Accountant", "Technician"]
+SENIOR = Principal(id=1, username="boss", role="Manager")
+EMPLOYEE = Principal(id=2, username="emp", role="Engineer")
+START = datetime(2020, 1, 1)
+
+
+@pytest.fixture(scope="module")
+def engine(tmp_path_factory):
+    engine = create_engine(f"sqlite:///{tmp_path_factory.mktemp('list') / 'list.db'}")
+    Base.metadata.create_all(engine)
+    rng = random.Random(17)
+    documents, visibility = [], []
+    for i in range(1, DOCUMENTS + 1):
+        role = ALL_EMPLOYEES if rng.random() < 0.3 else rng.choice(ROLES)
+        documents.append({
+            "id": i, "filename": f"f{i}.txt", "file_path": f"/blobs/{i}", "user_id": 1,
+            "department": "Operations", "access_role": role, "content_hash": f"{i:064d}",
+            "uploaded_at": START + timedelta(minutes=i),
+        })
+        visibility.append({"role": ALL_ROLES if role == ALL_EMPLOYEES else role, "doc_id": i})
+    with engine.begin() as connection:
+        connection.execute(insert(User), [
+            {"id": p.id, "username": p.username, "full_name": p.username,
+             "email": f"{p.username}@example.com", "hashed_password": "x", "role": p.role}
+            for p in (SENIOR, EMPLOYEE)
+        ])
+        connection.execute(insert(Document), documents)
+        connection.execute(insert(DocumentVisibility), visibility)
+        connection.execute(text("ANALYZE"))
+    return engine
+
+
+async def _page_ms(engine, principal, cursor) -> float:
+    timings = []
+    async_engine = create_async_engine(engine.url.set(drivername="sqlite+aiosqlite"))
+    try:
+        async with AsyncSession(async_engine) as db:
+            for _ in range(RUNS):
+                started = time.perf_counter()
+                page = await list_documents(
+                    response=Response(), cursor=cursor, limit=PAGE, fields=None, department=None,
+                    access_role=None, uploaded_after=None, uploaded_before=None, db=db, current_user=principal,
+                )
+                timings.append(time.perf_counter() - started)
+                assert len(page) == PAGE
+    finally:
+        await async_engine.dispose()
+    return 1000 * statistics.median(timings)
+
+
+@pytest.mark.parametrize("principal", [SENIOR, EMPLOYEE], ids=["senior", "employee"])
+def test_deep_page_costs_the_same_as_the_first(engine, principal):
+    # cursor of a row 90k documents into the newest-first listing
+    deep_id = DOCUMENTS - 90_000
+    deep_cursor = encode_cursor(START + timedelta(minutes=deep_id), deep_id)
+
+    first = asyncio.run(_page_ms(engine, principal, None))
+    deep = asyncio.run(_page_ms(engine, principal, deep_cursor))
+    print(f"\n{principal.role}: first page {first:.2f} ms, page 90k rows deep {deep:.2f} ms")
+    assert deep < 3 * first + 2, "page fetches should not grow with the cursor's depth"
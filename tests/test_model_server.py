@@ -0,0 +1,55 @@
+# tests/test_model_server.py
+import asyncio
+
+import pytest
+
+from mychatbot.model_server import ModelServer
+
+
+class StubModel:
+    """Stands in for generate_batch: records each batch and echoes the prompts."""
+
+    def __init__(self, fail: bool = False):
+        self.batches = []
+        self.fail = fail
+
+    def __call__(self, prompts, max_new_tokens=None):
+        self.batches.append(list(prompts))
+        if self.fail:
+            raise RuntimeError("model crashed")
+        return [f"reply to {prompt}" for prompt in prompts]
+
+
+async def _run(server, prompts):
+    try:
+        return await asyncio.gather(*(server.agenerate(p) for p in prompts), return_exceptions=True)
+    finally:
+        await server.stop()
+
+
+def test_concurrent_requests_share_one_generate_call():
+    server, model = ModelServer(), StubModel()
+    server.generate_batch = model
+    prompts = [f"question {i}" for i in range(8)]
+
+    replies = asyncio.run(_run(server, prompts))
+
+    assert model.batches == [prompts]
+    assert replies == [f"reply to {p}" for p in prompts]
+    assert server.stats()["avg_batch_size"] == 8
+
+
+def test_batch_failure_reaches_every_caller():
+    server, model = ModelServer(), StubModel(fail=True)
+    server.generate_batch = model
+
+    replies = asyncio.run(_run(server, ["a", "b", "c"]))
+
+    assert len(model.batches) == 1
+    assert all(isinstance(r, RuntimeError) for r in replies)
+
+
+@pytest.mark.parametrize("role, status", [(None, 401), ("Manager", 403), ("Admin", 200)])
+def test_chat_metrics_are_admin_only(client, login, role, status):
+    headers = login(role) if role else {}
+    assert client.get("/chat/metrics", headers=headers).status_code == status
@@ -0,0 +1,95 @@
+# tests/test_password_hashing.py
+# bcrypt runs in a bounded process pool at BCRYPT_ROUNDS; old-cost hashes are upgraded on
+# login, a full queue sheds load with a 503, and login throughput is reported.
+import asyncio
+import statistics
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from passlib.context import CryptContext
+
+from app.core import security
+from app.core.security import BCRYPT_ROUNDS, ahash_password, averify_password
+from app.database import SessionLocal
+from app.models.user import User
+
+LOGINS = 40
+CONCURRENCY = 8
+
+
+def _register(client, password: str = "secret-pw") -> str:
+    username = f"user-{uuid.uuid4().hex[:12]}"
+    response = client.post("/auth/register", json={
+        "username": username, "full_name": username, "email": f"{username}@example.com",
+        "password": password, "role": "Manager",
+    })
+    assert response.status_code == 200, response.text
+    return username
+
+
+def _stored_hash(username: str) -> str:
+    db = SessionLocal()
+    try:
+        return db.query(User).filter(User.username == username).one().hashed_password
+    finally:
+        db.close()
+
+
+def _set_hash(username: str, hashed_password: str) -> None:
+    db = SessionLocal()
+    try:
+        db.query(User).filter(User.username == username).one().hashed_password = hashed_password
+        db.commit()
+    finally:
+        db.close()
+
+
+def test_pool_hashes_at_configured_cost(client):
+    hashed = asyncio.run(ahash_password("secret-pw"))
+    assert hashed.startswith(f"$2b${BCRYPT_ROUNDS:02d}$")
+    assert asyncio.run(averify_password("secret-pw", hashed)) == (True, False)
+    assert asyncio.run(averify_password("wrong", hashed)) == (False, False)
+
+
+def test_login_rehashes_an_old_cost_hash(client):
+    username = _register(client)
+    old_hash = CryptContext(schemes=["bcrypt"], bcrypt__rounds=BCRYPT_ROUNDS + 1).hash("secret-pw")
+    _set_hash(username, old_hash)
+
+    response = client.post("/auth/login", json={"username": username, "password": "secret-pw"})
+    assert response.status_code == 200, response.text
+    new_hash = _stored_hash(username)
+    assert new_hash != old_hash and new_hash.startswith(f"$2b${BCRYPT_ROUNDS:02d}$")
+
+    # current-cost hashes are left alone
+    assert client.post("/auth/login", json={"username": username, "password": "secret-pw"}).status_code == 200
+    assert _stored_hash(username) == new_hash
+
+
+def test_full_hash_queue_returns_503(client, monkeypatch):
+    username = _register(client)
+    monkeypatch.setattr(security, "HASH_MAX_PENDING", 0)
+    response = client.post("/auth/login", json={"username": username, "password": "secret-pw"})
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "1"
+
+
+def test_login_throughput(client):
+    username = _register(client)
+
+    def login(_):
+        started = time.perf_counter()
+        response = client.post("/auth/login", json={"username": username, "password": "secret-pw"})
+        assert response.status_code == 200, response.text
+        return time.perf_counter() - started
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=CONCURRENCY) as pool:
+        latencies = list(pool.map(login, range(LOGINS)))
+    elapsed = time.perf_counter() - started
+    print(
+        f"\n{LOGINS} logins, {CONCURRENCY} concurrent, bcrypt rounds {BCRYPT_ROUNDS}: "
+        f"{LOGINS / elapsed:.1f} logins/s, p50 {1000 * statistics.median(latencies):.1f} ms"
+    )
+    assert len(latencies) == LOGINS
@@ -0,0 +1,85 @@
+# tests/test_pdf_benchmark.py
+# Benchmark: a generated 500-page PDF extracted with PDF_WORKERS=1 (sequential) and with
+# N worker processes. Reports the speedup; asserts the sharded path runs and keeps page order.
+import os
+import time
+
+import pytest
+
+from app.services import extractors
+
+PAGES = 500
+LINES_PER_PAGE = 40
+
+
+def _text_pdf(path, pages: int) -> str:
+    """Minimal PDF with one Helvetica text stream per page ("Page <n> line <i> ...")."""
+    objects = [b"<< /Type /Catalog /Pages 2 0 R >>", None,
+               b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    kids = []
+    for number in range(1, pages + 1):
+        lines = "".join(
+            f"(Page {number} line {i} lorem ipsum dolor sit amet) Tj T* " for i in range(LINES_PER_PAGE)
+        )
+        stream = f"BT /F1 8 Tf 10 TL 20 780 Td {lines}ET".encode()
+        objects.append(b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream))
+        objects.append(b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+                       b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % len(objects))
+        kids.append(f"{len(objects)} 0 R")
+    objects[1] = f"<< /Type /Pages /Kids [{' '.join(kids)}] /Count {pages} >>".encode()
+
+    out, offsets = bytearray(b"%PDF-1.4\n"), []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n%s\nendobj\n" % (number, body)
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    out += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    with open(path, "wb") as f:
+        f.write(out)
+    return str(path)
+
+
+@pytest.fixture
+def big_pdf(tmp_path):
+    return _text_pdf(tmp_path / "manual.pdf", PAGES)
+
+
+def _timed_extract(pdf, monkeypatch, workers: int):
+    monkeypatch.setattr(extractors, "PDF_WORKERS", workers)
+    extractors.shutdown_pdf_pool()
+    try:
+        if workers > 1:
+            extractors._get_pdf_pool().submit(int).result()   # start the workers outside the timing
+        started = time.perf_counter()
+        pages = list(extractors.extract_pdf(pdf))
+        return pages, time.perf_counter() - started
+    finally:
+        extractors.shutdown_pdf_pool()
+
+
+def test_parallel_pdf_extraction_scales(big_pdf, monkeypatch):
+    workers = max(2, min(8, os.cpu_count() or 1))
+    pools = []
+    get_pool = extractors._get_pdf_pool
+
+    def spy():
+        pool = get_pool()
+        pools.append(pool)
+        return pool
+
+    sequential, sequential_s = _timed_extract(big_pdf, monkeypatch, 1)
+    monkeypatch.setattr(extractors, "_get_pdf_pool", spy)
+    parallel, parallel_s = _timed_extract(big_pdf, monkeypatch, workers)
+
+    print(
+        f"\n{PAGES}-page PDF on {os.cpu_count()} cores: {sequential_s:.2f}s with 1 worker, "
+        f"{parallel_s:.2f}s with {workers} workers ({sequential_s / parallel_s:.2f}x)"
+    )
+    assert pools, "the sharded worker-pool path was not used"
+    assert len(parallel) == PAGES
+    assert parallel == sequential
+    assert [page.split()[1] for page in parallel] == [str(n) for n in range(1, PAGES + 1)]
+    if (os.cpu_count() or 1) >= 4:
+        assert parallel_s < sequential_s, "sharded extraction should beat one worker on 4+ cores"
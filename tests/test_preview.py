@@ -0,0 +1,32 @@
+from app.services import extractors
+from app.services.document_service import file_sha256, read_cached_text, write_cached_text
+from app.services.preview_service import TEASER_CHARS, make_teaser
+
+
+def test_teaser_extracts_only_a_prefix(tmp_path, monkeypatch):
+    path = tmp_path / "handbook.txt"
+    path.write_text("Leave policy overview. " * 20000, encoding="utf-8")
+    blocks = []
+
+    def spy(file_path):
+        for block in extractors.extract_text(file_path):
+            blocks.append(block)
+            yield block
+
+    monkeypatch.setattr(extractors, "TEXT_BLOCK_CHARS", 1024)
+    monkeypatch.setitem(extractors.EXTRACTORS, extractors.TEXT, spy)
+
+    teaser = make_teaser(str(path))
+    assert teaser.startswith("Leave policy overview.") and teaser.endswith("…")
+    assert len(teaser) <= TEASER_CHARS + 1
+    assert len(blocks) == 1                       # stopped after the first block
+    assert read_cached_text(file_sha256(str(path))) is None   # no partial text cached
+
+
+def test_teaser_uses_cached_text(tmp_path, monkeypatch):
+    path = tmp_path / "notes.txt"
+    path.write_text("raw file text", encoding="utf-8")
+    write_cached_text(file_sha256(str(path)), "cached extraction")
+    monkeypatch.setitem(extractors.EXTRACTORS, extractors.TEXT, lambda file_path: iter(()))
+
+    assert make_teaser(str(path)) == "cached extraction"
@@ -0,0 +1,92 @@
+# tests/test_rasa_client.py
+import asyncio
+
+import httpx
+import pytest
+
+from mychatbot import rasa_client
+
+COOLDOWN = 0.05
+
+
+class StubRasa:
+    """Stand-in for the Rasa REST webhook: answers or fails on demand, counting requests."""
+
+    def __init__(self):
+        self.healthy = True
+        self.requests = 0
+
+    async def __call__(self, request: httpx.Request) -> httpx.Response:
+        self.requests += 1
+        if not self.healthy:
+            return httpx.Response(503)
+        return httpx.Response(200, json=[{"recipient_id": "user", "text": "Hello from Rasa"}])
+
+
+@pytest.fixture
+def rasa(monkeypatch):
+    stub = StubRasa()
+    monkeypatch.setattr(rasa_client, "breaker", rasa_client.CircuitBreaker(failure_threshold=3, cooldown=COOLDOWN))
+    monkeypatch.setattr(rasa_client, "_client", httpx.AsyncClient(transport=httpx.MockTransport(stub)))
+    return stub
+
+
+def test_breaker_open_half_open_closed(rasa):
+    breaker = rasa_client.breaker
+
+    async def scenario():
+        assert await rasa_client.aget_rasa_response("hi") == "Hello from Rasa"
+        assert breaker.state == "closed"
+
+        rasa.healthy = False
+        for _ in range(3):
+            assert await rasa_client.aget_rasa_response("hi") is None
+        assert breaker.state == "open"
+
+        # open: Rasa is not called at all
+        calls = rasa.requests
+        assert await rasa_client.aget_rasa_response("hi") is None
+        assert rasa.requests == calls
+
+        # half-open trial fails -> open again for another cooldown
+        await asyncio.sleep(COOLDOWN * 1.5)
+        assert breaker.state == "half-open"
+        assert await rasa_client.aget_rasa_response("hi") is None
+        assert rasa.requests == calls + 1
+        assert breaker.state == "open"
+
+        # half-open trial succeeds -> closed
+        rasa.healthy = True
+        await asyncio.sleep(COOLDOWN * 1.5)
+        assert breaker.state == "half-open"
+        assert await rasa_client.aget_rasa_response("hi") == "Hello from Rasa"
+        assert breaker.state == "closed" and breaker.failures == 0
+
+    asyncio.run(scenario())
+
+
+def test_half_open_allows_a_single_trial(rasa):
+    breaker = rasa_client.breaker
+    for _ in range(3):
+        breaker.record_failure()
+    breaker.opened_at -= COOLDOWN
+
+    assert breaker.allow() is True
+    assert breaker.allow() is False   # second caller while the trial is in flight
+    breaker.release()                 # trial abandoned (cancelled)
+    assert breaker.allow() is True
+
+
+def test_connect_errors_count_as_failures(monkeypatch):
+    def refuse(request):
+        raise httpx.ConnectError("connection refused")
+
+    monkeypatch.setattr(rasa_client, "breaker", rasa_client.CircuitBreaker(failure_threshold=2, cooldown=60))
+    monkeypatch.setattr(rasa_client, "_client", httpx.AsyncClient(transport=httpx.MockTransport(refuse)))
+
+    async def scenario():
+        assert await rasa_client.aget_rasa_response("hi") is None
+        assert await rasa_client.aget_rasa_response("hi") is None
+
+    asyncio.run(scenario())
+    assert rasa_client.breaker.state == "open"
@@ -0,0 +1,54 @@
+# tests/test_retrieval_cache.py
+import pytest
+
+from app.services import semantic_search
+from mychatbot import chatbot
+
+
+def _upload(client, headers, content: bytes) -> int:
+    response = client.post(
+        "/documents/documents/upload",
+        headers=headers,
+        files={"file": ("policy.txt", content, "text/plain")},
+        data={"title": "policy.txt", "access_roles": '["All Employees"]'},
+    )
+    assert response.status_code == 200, response.text
+    return response.json()["id"]
+
+
+@pytest.fixture
+def searches(monkeypatch):
+    calls = []
+
+    def fake_search(message, top_k, allowed_doc_ids=None):
+        calls.append(message)
+        return [{"doc_id": 1, "text": "Leave is 30 days a year.", "score": 0.9}]
+
+    monkeypatch.setattr(semantic_search, "semantic_search", fake_search)
+    chatbot.clear_retrieval_cache()
+    return calls
+
+
+def test_retrievals_are_cached(searches):
+    chatbot.retrieve_chunks("How much leave?")
+    chatbot.retrieve_chunks("how much  LEAVE?")
+    assert len(searches) == 1
+
+
+def test_delete_clears_cached_retrievals(client, login, searches):
+    headers = login("Manager")
+    doc_id = _upload(client, headers, b"retrieval cache delete test")
+    chatbot.retrieve_chunks("How much leave?")
+
+    assert client.delete(f"/documents/documents/delete/{doc_id}", headers=headers).status_code == 200
+    chatbot.retrieve_chunks("How much leave?")
+    assert len(searches) == 2
+
+
+def test_upload_clears_cached_retrievals(client, login, searches):
+    headers = login("Manager")
+    chatbot.retrieve_chunks("How much leave?")
+
+    _upload(client, headers, b"retrieval cache upload test")   # background tasks run before the response returns
+    chatbot.retrieve_chunks("How much leave?")
+    assert len(searches) == 2
@@ -0,0 +1,34 @@
+# tests/test_search.py
+from app.services.search_service import MARK_START, MARK_STOP, _highlight, _marked_html
+
+
+def test_highlight_escapes_document_text():
+    snippet = _highlight('budget <script>alert("x")</script> & <b>Budget</b>', ["budget"])
+    assert "<script>" not in snippet and "<b>" not in snippet
+    assert snippet == (
+        '<mark>budget</mark> &lt;script&gt;alert(&quot;x&quot;)&lt;/script&gt; &amp; '
+        '&lt;b&gt;<mark>Budget</mark>&lt;/b&gt;'
+    )
+
+
+def test_headline_markers_become_the_only_tags():
+    headline = f"<img src=x onerror=alert(1)> {MARK_START}budget{MARK_STOP} plan"
+    assert _marked_html(headline) == "&lt;img src=x onerror=alert(1)&gt; <mark>budget</mark> plan"
+
+
+def test_search_endpoint_returns_escaped_snippets(client, login):
+    headers = login("Manager")
+    content = b"Quarterly zebrafund report <script>steal()</script> zebrafund totals"
+    response = client.post(
+        "/documents/documents/upload",
+        headers=headers,
+        files={"file": ("report.txt", content, "text/plain")},
+        data={"title": "report", "access_roles": '["All Employees"]'},
+    )
+    assert response.status_code == 200, response.text
+
+    hits = client.get("/documents/documents/search", params={"q": "zebrafund"}, headers=headers).json()
+    assert len(hits) == 1
+    assert "<script>" not in hits[0]["snippet"]
+    assert "&lt;script&gt;" in hits[0]["snippet"]
+    assert hits[0]["snippet"].count("<mark>") == 2
@@ -0,0 +1,70 @@
+# tests/test_semantic_search.py
+import threading
+
+import numpy as np
+
+from app.services.semantic_search import VectorIndex
+
+DIM = 8
+
+
+def _vectors(n: int, seed: int) -> np.ndarray:
+    v = np.random.default_rng(seed).standard_normal((n, DIM)).astype(np.float32)
+    return v / np.linalg.norm(v, axis=1, keepdims=True)
+
+
+def test_search_during_concurrent_adds(tmp_path):
+    index = VectorIndex(str(tmp_path), DIM)
+    errors = []
+    done = threading.Event()
+
+    def writer():
+        try:
+            for doc_id in range(1, 60):
+                index.add(doc_id, _vectors(10, doc_id), [f"doc {doc_id} chunk {i}" for i in range(10)])
+        except Exception as e:
+            errors.append(e)
+        finally:
+            done.set()
+
+    def reader():
+        query = _vectors(1, 0)[0]
+        while not done.is_set():
+            try:
+                for row, _ in index.search(query, 5, np.arange(1, 60, 2)):
+                    assert index.chunk(row)["doc_id"] % 2 == 1
+            except Exception as e:
+                errors.append(e)
+                return
+
+    threads = [threading.Thread(target=writer)] + [threading.Thread(target=reader) for _ in range(3)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert not errors
+
+
+def test_reindex_replaces_rows(tmp_path):
+    index = VectorIndex(str(tmp_path), DIM)
+    index.add(1, _vectors(3, 1), ["a", "b", "c"])
+    index.add(1, _vectors(2, 2), ["d", "e"])
+    texts = {index.chunk(row)["text"] for row, _ in index.search(_vectors(1, 0)[0], 10)}
+    assert texts == {"d", "e"}
+
+
+def test_crashed_append_is_ignored_and_repaired(tmp_path):
+    index = VectorIndex(str(tmp_path), DIM)
+    index.add(1, _vectors(2, 1), ["a", "b"])
+    # a writer died after the offsets/doc_ids appends but before its vectors
+    with open(tmp_path / "offsets.i64", "ab") as f:
+        np.array([999], dtype=np.int64).tofile(f)
+    with open(tmp_path / "doc_ids.i32", "ab") as f:
+        np.array([7], dtype=np.int32).tofile(f)
+
+    reopened = VectorIndex(str(tmp_path), DIM)
+    assert len(reopened.search(_vectors(1, 0)[0], 10)) == 2
+
+    reopened.add(2, _vectors(1, 2), ["c"])
+    by_text = {reopened.chunk(row)["text"]: reopened.chunk(row)["doc_id"] for row, _ in reopened.search(_vectors(1, 0)[0], 10)}
+    assert by_text == {"a": 1, "b": 1, "c": 2}
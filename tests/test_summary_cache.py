@@ -0,0 +1,112 @@
+# tests/test_summary_cache.py
+import time
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+from app.database import Base, SessionLocal
+from app.models import user, document_access, document_text  # noqa: F401  (register mapped tables)
+from app.models.document import Document
+from app.models.summary_cache import SummaryCache
+from app.services import ai_helpers, summary_jobs
+from app.services.ai_helpers import get_cached_summary, store_summary
+
+PARAMS = {"max_completion_tokens": 250}
+HASH_A, HASH_B = "a" * 64, "b" * 64
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    with Session(engine) as db:
+        db.add_all(Document(id=i, filename=f"f{i}.txt", file_path=f"/blobs/{i}") for i in range(1, 6))
+        db.commit()
+        yield db
+
+
+def test_hit_and_miss(db):
+    assert get_cached_summary(db, 1, HASH_A, "openai", "m", PARAMS) is None
+    store_summary(db, 1, HASH_A, "openai", "m", PARAMS, "summary one")
+
+    assert get_cached_summary(db, 1, HASH_A, "openai", "m", dict(PARAMS)) == "summary one"
+    assert get_cached_summary(db, 1, HASH_A, "openai", "other-model", PARAMS) is None
+    assert get_cached_summary(db, 1, HASH_A, "openai", "m", {"max_completion_tokens": 100}) is None
+    assert get_cached_summary(db, 1, HASH_A, "huggingface", "m", PARAMS) is None
+    # identical content uploaded as another document reuses the summary
+    assert get_cached_summary(db, 2, HASH_A, "openai", "m", PARAMS) == "summary one"
+
+
+def test_new_content_hash_drops_old_summaries(db):
+    store_summary(db, 1, HASH_A, "openai", "m", PARAMS, "old content")
+    store_summary(db, 1, HASH_B, "openai", "m", PARAMS, "new content")
+
+    assert get_cached_summary(db, 1, HASH_A, "openai", "m", PARAMS) is None
+    assert get_cached_summary(db, 1, HASH_B, "openai", "m", PARAMS) == "new content"
+    assert db.query(SummaryCache).count() == 1
+
+
+def test_expired_entry_is_a_miss(db, monkeypatch):
+    store_summary(db, 1, HASH_A, "openai", "m", PARAMS, "stale")
+    db.query(SummaryCache).update({"created_at": datetime.utcnow() - timedelta(hours=2)})
+    db.commit()
+    monkeypatch.setattr(ai_helpers, "SUMMARY_CACHE_TTL", timedelta(hours=1))
+
+    assert get_cached_summary(db, 1, HASH_A, "openai", "m", PARAMS) is None
+    assert db.query(SummaryCache).count() == 0
+
+
+def test_least_recently_used_entries_are_evicted(db, monkeypatch):
+    monkeypatch.setattr(ai_helpers, "SUMMARY_CACHE_MAX_ENTRIES", 3)
+    for doc_id in (1, 2, 3):
+        store_summary(db, doc_id, f"{doc_id}" * 64, "openai", "m", PARAMS, f"summary {doc_id}")
+        time.sleep(0.002)
+    get_cached_summary(db, 1, "1" * 64, "openai", "m", PARAMS)   # 1 is now more recent than 2
+    time.sleep(0.002)
+    store_summary(db, 4, "4" * 64, "openai", "m", PARAMS, "summary 4")
+
+    assert sorted(doc_id for (doc_id,) in db.query(SummaryCache.doc_id)) == [1, 3, 4]
+
+
+# ---------------- Through the app ----------------
+def _upload(client, headers, content: bytes) -> int:
+    response = client.post(
+        "/documents/documents/upload", headers=headers,
+        files={"file": ("report.txt", content, "text/plain")},
+        data={"title": "report.txt", "access_roles": '["All Employees"]'},
+    )
+    assert response.status_code == 200, response.text
+    return response.json()["id"]
+
+
+def _content_hash(doc_id: int) -> str:
+    with SessionLocal() as db:
+        return db.query(Document.content_hash).filter(Document.id == doc_id).scalar()
+
+
+def test_lookup_sets_cached_flag(client, login, monkeypatch):
+    monkeypatch.setattr(ai_helpers, "OPENAI_API_KEY", "test-key")
+    doc_id = _upload(client, login("Manager"), b"summary cache flag test")
+    assert summary_jobs.lookup_document(doc_id)[2] is None
+
+    with SessionLocal() as db:
+        store_summary(db, doc_id, _content_hash(doc_id), "openai", ai_helpers.OPENAI_MODEL,
+                      ai_helpers.OPENAI_CACHE_PARAMS, "cached summary")
+    cached = summary_jobs.lookup_document(doc_id)[2]
+    assert cached == {"summary": "cached summary", "source": "openai", "model": ai_helpers.OPENAI_MODEL, "cached": True}
+
+    response = client.get(f"/summarize/{doc_id}")
+    assert response.status_code == 200 and response.json()["cached"] is True
+
+
+def test_delete_document_invalidates_summaries(client, login):
+    headers = login("Manager")
+    doc_id = _upload(client, headers, b"summary cache delete test")
+    with SessionLocal() as db:
+        store_summary(db, doc_id, _content_hash(doc_id), "openai", "m", PARAMS, "to be removed")
+
+    assert client.delete(f"/documents/documents/delete/{doc_id}", headers=headers).status_code == 200
+    with SessionLocal() as db:
+        assert db.query(SummaryCache).filter(SummaryCache.doc_id == doc_id).count() == 0
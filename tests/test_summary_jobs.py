@@ -0,0 +1,50 @@
+# tests/test_summary_jobs.py
+import asyncio
+
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.services import summary_jobs
+
+
+async def _events(job):
+    return [event async for event in summary_jobs.job_events(job)]
+
+
+def test_late_subscriber_gets_done_event():
+    async def scenario():
+        job = summary_jobs.SummaryJob(doc_id=1)
+        job.update(status="done", progress=1.0, result={"summary": "s"})
+        return await _events(job)
+
+    events = asyncio.run(scenario())
+    assert len(events) == 1
+    assert events[0].startswith("event: done\n")
+
+
+def test_subscriber_sees_progress_then_done():
+    async def scenario():
+        job = summary_jobs.SummaryJob(doc_id=1)
+        consumer = asyncio.create_task(_events(job))
+        await asyncio.sleep(0.01)
+        job.update(status="summarizing", progress=0.5)
+        await asyncio.sleep(0.01)
+        job.update(status="done", progress=1.0, result={"summary": "s"})
+        return await consumer
+
+    events = asyncio.run(scenario())
+    assert [e.split("\n", 1)[0] for e in events] == ["event: progress", "event: progress", "event: done"]
+
+
+def test_cached_summary_skips_the_queue(monkeypatch):
+    cached = {"summary": "s", "source": "openai", "model": "m", "cached": True}
+    monkeypatch.setattr(summary_jobs, "lookup_document", lambda doc_id: ("path", "hash", cached))
+
+    def busy(doc_id):
+        raise AssertionError("cache hit must not be queued")
+    monkeypatch.setattr(summary_jobs, "submit", busy)
+
+    with TestClient(app) as client:
+        response = client.get("/summarize/1")
+    assert response.status_code == 200
+    assert response.json() == cached
@@ -0,0 +1,67 @@
+# tests/test_summary_load.py
+# Load test: /documents/list latency must hold steady while 20 summaries are in flight on
+# the same event loop (TestClient runs the app on one loop, like a single uvicorn worker).
+import asyncio
+import statistics
+import threading
+import time
+import uuid
+
+import httpx
+
+from app.services import ai_helpers
+
+HF_DELAY = 0.5      # seconds per (fake) Hugging Face call
+SUMMARIES = 20
+
+
+def _slow_hf_client() -> httpx.AsyncClient:
+    async def handler(request: httpx.Request) -> httpx.Response:
+        await asyncio.sleep(HF_DELAY)
+        return httpx.Response(200, json=[{"summary_text": "A short summary."}])
+    return httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+
+def _list_latencies(client, headers, count: int = 20) -> list[float]:
+    latencies = []
+    for _ in range(count):
+        started = time.perf_counter()
+        assert client.get("/documents/documents/list", headers=headers).status_code == 200
+        latencies.append(time.perf_counter() - started)
+    return latencies
+
+
+def test_list_latency_steady_while_summaries_run(client, login, monkeypatch):
+    headers = login("Manager")
+    doc_ids = []
+    for i in range(SUMMARIES):
+        content = f"Report {uuid.uuid4().hex}. Revenue grew in quarter {i}. Costs were flat.".encode()
+        response = client.post(
+            "/documents/documents/upload", headers=headers,
+            files={"file": (f"r{i}.txt", content, "text/plain")},
+            data={"access_roles": '["All Employees"]'},
+        )
+        doc_ids.append(response.json()["id"])
+
+    monkeypatch.setattr(ai_helpers, "HF_API_KEY", "test-key")
+    monkeypatch.setattr(ai_helpers, "_http_client", _slow_hf_client())
+
+    baseline = statistics.median(_list_latencies(client, headers))
+
+    results = []
+    workers = [
+        threading.Thread(target=lambda d=d: results.append(client.get(f"/summarize/{d}").status_code))
+        for d in doc_ids
+    ]
+    for w in workers:
+        w.start()
+    time.sleep(0.2)
+    under_load = _list_latencies(client, headers)
+    still_running = SUMMARIES - len(results)
+    for w in workers:
+        w.join()
+
+    assert results == [200] * SUMMARIES
+    assert still_running > 0, "summaries finished before the list was measured"
+    # a blocked event loop would add at least one HF_DELAY to list requests
+    assert statistics.median(under_load) < max(5 * baseline, 0.05), (baseline, under_load)
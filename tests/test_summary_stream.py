@@ -0,0 +1,108 @@
+# tests/test_summary_stream.py
+# /summarize/{id}/stream against a local fake OpenAI-compatible server streaming SSE chunks.
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from app.services import ai_helpers
+
+TOKENS = ["The ", "policy ", "grants ", "30 ", "days."]
+
+
+class FakeOpenAI(BaseHTTPRequestHandler):
+    fail_after = None   # send an error event after this many tokens
+    requests = []
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        FakeOpenAI.requests.append(body)
+        assert self.path == "/v1/chat/completions" and body["stream"] is True
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.end_headers()
+        for number, token in enumerate(TOKENS):
+            if number == self.fail_after:
+                self._event({"error": {"message": "upstream overloaded", "type": "server_error"}})
+                return
+            self._event({
+                "id": "c1", "object": "chat.completion.chunk", "created": 0, "model": body["model"],
+                "choices": [{"index": 0, "delta": {"content": token}, "finish_reason": None}],
+            })
+        self.wfile.write(b"data: [DONE]\n\n")
+
+    def _event(self, data: dict) -> None:
+        self.wfile.write(f"data: {json.dumps(data)}\n\n".encode())
+        self.wfile.flush()
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def fake_openai(monkeypatch):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FakeOpenAI)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    FakeOpenAI.fail_after, FakeOpenAI.requests = None, []
+    monkeypatch.setattr(ai_helpers, "HF_API_KEY", None)
+    monkeypatch.setattr(ai_helpers, "OPENAI_API_KEY", "test-key")
+    monkeypatch.setattr(ai_helpers, "OPENAI_BASE_URL", f"http://127.0.0.1:{server.server_port}/v1")
+    monkeypatch.setattr(ai_helpers, "_openai_client", None)
+    yield FakeOpenAI
+    server.shutdown()
+    server.server_close()
+    ai_helpers._openai_client = None
+
+
+def _upload(client, headers, content: bytes) -> int:
+    response = client.post(
+        "/documents/documents/upload", headers=headers,
+        files={"file": ("policy.txt", content, "text/plain")},
+        data={"title": "policy.txt", "access_roles": '["All Employees"]'},
+    )
+    assert response.status_code == 200, response.text
+    return response.json()["id"]
+
+
+def _events(client, doc_id: int) -> list[tuple[str, dict]]:
+    with client.stream("GET", f"/summarize/{doc_id}/stream") as response:
+        assert response.status_code == 200
+        body = "".join(response.iter_text())
+    events = []
+    for block in body.strip().split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in block.splitlines())
+        events.append((lines["event"], json.loads(lines["data"])))
+    return events
+
+
+def test_tokens_stream_in_order_and_are_cached(client, login, fake_openai):
+    doc_id = _upload(client, login("Manager"), b"Employees get 30 days of annual leave. " * 5)
+
+    events = _events(client, doc_id)
+    assert events[0] == ("meta", {"source": "openai", "model": ai_helpers.OPENAI_MODEL, "cached": False})
+    assert [data["text"] for name, data in events if name == "token"] == TOKENS
+    assert events[-1] == ("done", {"summary": "".join(TOKENS), "source": "openai",
+                                   "model": ai_helpers.OPENAI_MODEL, "cached": False})
+
+    # second request: served from the summary cache without calling the server again
+    events = _events(client, doc_id)
+    assert events[-1][0] == "done" and events[-1][1]["cached"] is True
+    assert events[-1][1]["summary"] == "".join(TOKENS)
+    assert len(fake_openai.requests) == 1
+
+
+def test_mid_stream_failure_emits_error_event(client, login, fake_openai):
+    fake_openai.fail_after = 2
+    doc_id = _upload(client, login("Manager"), b"Travel claims are reimbursed within 10 days. " * 5)
+
+    events = _events(client, doc_id)
+    assert [data["text"] for name, data in events if name == "token"] == TOKENS[:2]
+    assert events[-1][0] == "error"
+    assert "interrupted" in events[-1][1]["detail"]
+
+    # nothing was cached: the next request asks the server again
+    fake_openai.fail_after = None
+    assert _events(client, doc_id)[-1][1]["cached"] is False
+    assert len(fake_openai.requests) == 2
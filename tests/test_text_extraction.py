@@ -0,0 +1,132 @@
+# tests/test_text_extraction.py
+import os
+
+from PyPDF2 import PdfWriter
+
+from app.services import document_service, extractors
+
+
+def _blank_pdf(path, pages: int) -> str:
+    writer = PdfWriter()
+    for _ in range(pages):
+        writer.add_blank_page(width=200, height=200)
+    with open(path, "wb") as f:
+        writer.write(f)
+    return str(path)
+
+
+def _drain(stream):
+    parts = []
+    while True:
+        try:
+            parts.append(next(stream))
+        except StopIteration as stop:
+            return parts, stop.value
+
+
+def test_pdf_cut_reasons(tmp_path, monkeypatch):
+    pdf = _blank_pdf(tmp_path / "doc.pdf", 5)
+    assert _drain(extractors.extract_pdf(pdf)) == ([""] * 5, None)
+
+    monkeypatch.setattr(extractors, "PDF_MAX_PAGES", 3)
+    assert _drain(extractors.extract_pdf(pdf)) == ([""] * 3, extractors.CUT_PAGES)
+
+    monkeypatch.setattr(extractors, "PDF_TIME_BUDGET", -1)
+    assert _drain(extractors.extract_pdf(pdf))[1] == extractors.CUT_TIME
+
+
+def _fake_extractor(monkeypatch, cut):
+    def fake(file_path):
+        yield "page one"
+        return cut
+    monkeypatch.setattr(document_service, "iter_document_text", fake)
+
+
+def test_time_budget_cut_is_not_cached(tmp_path, monkeypatch):
+    path = tmp_path / "slow.pdf"
+    path.write_bytes(b"%PDF-1.4 slow")
+    _fake_extractor(monkeypatch, extractors.CUT_TIME)
+
+    assert document_service.get_document_text(str(path)) == "page one"
+    assert document_service.read_cached_text(document_service.file_sha256(str(path))) is None
+
+
+def test_page_cap_cut_is_cached_under_the_cap(tmp_path, monkeypatch):
+    path = tmp_path / "long.pdf"
+    path.write_bytes(b"%PDF-1.4 long")
+    _fake_extractor(monkeypatch, extractors.CUT_PAGES)
+    content_hash = document_service.file_sha256(str(path))
+
+    document_service.get_document_text(str(path))
+    assert os.path.exists(document_service._text_cache_path(content_hash, page_capped=True))
+    assert not os.path.exists(document_service._text_cache_path(content_hash))
+    assert document_service.read_cached_text(content_hash) == "page one"
+
+
+def test_complete_text_is_cached(tmp_path, monkeypatch):
+    path = tmp_path / "short.txt"
+    path.write_text("hello")
+    _fake_extractor(monkeypatch, None)
+
+    document_service.get_document_text(str(path))
+    assert document_service.read_cached_text(document_service.file_sha256(str(path))) == "page one"
+
+
+# ---------------- Office formats ----------------
+def _budget_xlsx(path) -> str:
+    from openpyxl import Workbook
+    workbook = Workbook()
+    sheet = workbook.active
+    sheet.title = "Budget"
+    sheet.append(["Item", "Amount"])
+    for i in range(5):
+        sheet.append([f"Line {i}", 100 * i])
+    sheet.append([None, None])   # empty rows are skipped
+    staff = workbook.create_sheet("Staff")
+    staff.append(["Name", "Role"])
+    staff.append(["Asha", "Engineer"])
+    workbook.save(path)
+    return str(path)
+
+
+def test_xlsx_yields_blocks_per_sheet(tmp_path, monkeypatch):
+    monkeypatch.setattr(extractors, "XLSX_ROWS_PER_BLOCK", 4)
+    path = _budget_xlsx(tmp_path / "Budget_Report.xlsx")
+
+    assert extractors.sniff_mime(path) == extractors.XLSX
+    blocks = list(extractors.iter_document_text(path))
+    assert blocks == [
+        "Sheet: Budget\nItem\tAmount\nLine 0\t0\nLine 1\t100",
+        "Line 2\t200\nLine 3\t300\nLine 4\t400",
+        "Sheet: Staff\nName\tRole\nAsha\tEngineer",
+    ]
+
+
+def _briefing_pptx(path) -> str:
+    from pptx import Presentation
+    from pptx.util import Inches
+    presentation = Presentation()
+    slide = presentation.slides.add_slide(presentation.slide_layouts[1])
+    slide.shapes.title.text = "Safety briefing"
+    slide.placeholders[1].text = "Wear helmets on site"
+    slide.notes_slide.notes_text_frame.text = "Mention the new gate"
+
+    slide = presentation.slides.add_slide(presentation.slide_layouts[5])
+    slide.shapes.title.text = "Shifts"
+    table = slide.shapes.add_table(2, 2, Inches(1), Inches(2), Inches(4), Inches(1)).table
+    for r, row in enumerate([["Team", "Hours"], ["Night", "22-06"]]):
+        for c, value in enumerate(row):
+            table.cell(r, c).text = value
+    presentation.save(path)
+    return str(path)
+
+
+def test_pptx_yields_one_block_per_slide(tmp_path):
+    path = _briefing_pptx(tmp_path / "briefing.pptx")
+
+    assert extractors.sniff_mime(path) == extractors.PPTX
+    blocks = list(extractors.iter_document_text(path))
+    assert blocks == [
+        "Slide 1\nSafety briefing\nWear helmets on site\nNotes: Mention the new gate",
+        "Slide 2\nShifts\nTeam\tHours\nNight\t22-06",
+    ]
@@ -0,0 +1,121 @@
+# tests/test_visibility.py
+import importlib.util
+import pathlib
+import random
+
+import pytest
+from alembic.operations import Operations
+from alembic.runtime.migration import MigrationContext
+from sqlalchemy import create_engine, exists, inspect, or_, select
+from sqlalchemy.orm import Session
+
+from app.database import Base
+from app.models import user, summary_cache, document_text  # noqa: F401  (register mapped tables)
+from app.models.document import Document
+from app.models.document_access import DocumentAccess
+from app.models.document_visibility import DocumentVisibility
+from app.services.visibility_service import (
+    ALL_EMPLOYEES, ALL_ROLES, backfill_document_visibility, can_view, set_document_visibility, visible_document_ids,
+    visible_documents_filter,
+)
+
+ROLES = ["HR Executive", "Engineer", "Accountant", "Station Controller", "Technician"]
+MIGRATION = pathlib.Path(__file__).parent.parent / "migrations" / "versions" / "c3d91f27a5e4_add_document_visibility_table.py"
+
+
+@pytest.fixture
+def engine():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    return engine
+
+
+def _random_documents(db: Session, count: int = 120, seed: int = 7) -> None:
+    """Documents and access grants shaped like uploads: All Employees or a set of granted roles."""
+    rng = random.Random(seed)
+    for i in range(count):
+        roles = [ALL_EMPLOYEES] if rng.random() < 0.3 else rng.sample(ROLES, rng.randint(0, 3))
+        # a custom role submitted literally as "*" must not share the document with everyone
+        if ALL_EMPLOYEES not in roles and rng.random() < 0.2:
+            roles.append(ALL_ROLES)
+        doc = Document(filename=f"f{i}.txt", file_path=f"/blobs/{i}", access_role=", ".join(roles) or None)
+        db.add(doc)
+        db.flush()
+        if ALL_EMPLOYEES not in roles:
+            db.add_all(DocumentAccess(doc_id=doc.id, role=role) for role in roles)
+        # stray grants on shared documents must not matter
+        if roles == [ALL_EMPLOYEES] and rng.random() < 0.5:
+            db.add(DocumentAccess(doc_id=doc.id, role=rng.choice(ROLES)))
+        set_document_visibility(db, doc.id, doc.access_role, roles)
+    db.commit()
+
+
+def _old_visible(db: Session, role: str) -> set[int]:
+    """The rules before document_visibility: shared with All Employees, or a matching grant."""
+    condition = or_(
+        Document.access_role == ALL_EMPLOYEES,
+        exists().where(DocumentAccess.doc_id == Document.id, DocumentAccess.role == role),
+    )
+    return {doc_id for (doc_id,) in db.execute(select(Document.id).where(condition))}
+
+
+def _assert_matches_old_rules(db: Session) -> None:
+    all_ids = [doc_id for (doc_id,) in db.execute(select(Document.id))]
+    for role in ROLES + ["Nobody"]:
+        expected = _old_visible(db, role)
+        assert {doc_id for (doc_id,) in db.execute(select(Document.id).where(visible_documents_filter(role)))} == expected
+        assert set(visible_document_ids(db, role).tolist()) == expected
+        assert {doc_id for doc_id in all_ids if can_view(db, role, doc_id)} == expected
+
+
+def test_upload_rows_match_old_rules(engine):
+    with Session(engine) as db:
+        _random_documents(db)
+        _assert_matches_old_rules(db)
+
+
+def test_backfill_matches_old_rules_and_is_idempotent(engine):
+    with Session(engine) as db:
+        _random_documents(db)
+        db.query(DocumentVisibility).delete()
+        db.commit()
+
+        backfill_document_visibility(db)
+        backfill_document_visibility(db)
+        db.commit()
+        _assert_matches_old_rules(db)
+
+
+def _run_migration(engine) -> None:
+    spec = importlib.util.spec_from_file_location("visibility_migration", MIGRATION)
+    migration = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(migration)
+    with engine.begin() as connection:
+        with Operations.context(MigrationContext.configure(connection)):
+            migration.upgrade()
+
+
+def test_migration_after_create_all_backfills(engine):
+    # the app started first: create_all made an empty document_visibility table
+    with Session(engine) as db:
+        _random_documents(db)
+        db.query(DocumentVisibility).delete()
+        db.commit()
+
+    _run_migration(engine)
+    _run_migration(engine)
+
+    with Session(engine) as db:
+        _assert_matches_old_rules(db)
+
+
+def test_migration_on_database_without_table(engine):
+    with Session(engine) as db:
+        _random_documents(db)
+    DocumentVisibility.__table__.drop(engine)
+
+    _run_migration(engine)
+
+    assert "ix_document_visibility_doc_id" in {ix["name"] for ix in inspect(engine).get_indexes("document_visibility")}
+    with Session(engine) as db:
+        _assert_matches_old_rules(db)